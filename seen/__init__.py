@@ -2,10 +2,12 @@ from .item import Item, BinItem
 from .logger import logger
 from .parser import Parser, ReParser, FuncParser
 from .selector import Css, Regex
+from .sink import JsonLinesSink, CsvSink, SqliteSink
 from .spider import Spider
 
 __all__ = ('Spider', 
     'Css', 'Regex', 
     'Parser', 'ReParser', 'FuncParser', 
     'Item', 'BinItem',
+    'JsonLinesSink', 'CsvSink', 'SqliteSink',
     'logger')
\ No newline at end of file
@@ -0,0 +1,186 @@
+"""
+Record the responses of a crawl into an archive file, and replay them later without network,
+so parsers can be changed and tried again quickly, and the parse path can be profiled on the same input.
+
+The archive is a log of length-prefixed records:
+    meta length (4 bytes) | body length (8 bytes) | meta (JSON) | body
+meta has the requested url, the kind ('http' or 'browser') and the url, code, headers or cookies of the response.
+The index (url: offset) is built by reading the heads of records when the archive is opened,
+the last record of the same url wins.
+
+Usage::
+    archive = ResponseArchive('crawl.archive', 'w')
+    archive.record('https://github.com', response)
+    archive.close()
+
+    archive = ResponseArchive('crawl.archive')
+    archive.get('https://github.com')
+    >>> <Response [200]>
+
+    # serve fetch_content and Browser.fetch.
+    await fetch_content('https://github.com', ArchiveSession(archive))
+    await ArchiveBrowser(archive).fetch('https://github.com')
+"""
+import os
+import json
+import mmap
+import struct
+
+try:
+    from multidict import CIMultiDict
+except ImportError:
+    CIMultiDict = dict
+
+from .asrequests import AioResult, ErrorRequest
+from .browser_response import BrowserResponse, emptyBrowserResponse
+
+
+_head = struct.Struct('>IQ')
+
+
+class ResponseArchive(object):
+    """
+        :param path: the path of the archive file.
+        :param mode: 'r' to replay, 'w' to record a new archive, 'a' to record to the end of it.
+    """
+
+    def __init__(self, path, mode='r'):
+        self.path = path
+        self.mode = mode
+        # url: (offset of meta, meta length, body length)
+        self.index = {}
+        self.file = None
+        self.map = None
+
+        if mode == 'r':
+            self.file = open(path, 'rb')
+            if os.path.getsize(path):
+                self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._build_index()
+        elif mode in ('w', 'a'):
+            self.file = open(path, mode + 'b')
+        else:
+            raise(TypeError('Unknow archive mode: {}.'.format(mode)))
+
+    def __repr__(self):
+        return '<ResponseArchive: {} {} responses>'.format(self.path, len(self.index))
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, url):
+        return url in self.index
+
+    def _build_index(self):
+        data = self.map
+        offset = 0
+        size = len(data)
+        while offset + _head.size <= size:
+            metaLength, bodyLength = _head.unpack_from(data, offset)
+            start = offset + _head.size
+            end = start + metaLength + bodyLength
+            # the last record is not complete (the crawl stopped while writing it).
+            if end > size:
+                break
+
+            meta = json.loads(data[start:start + metaLength].decode('utf-8'))
+            self.index[meta['request_url']] = (start, metaLength, bodyLength)
+            offset = end
+
+    def record(self, url, response):
+        """
+            :param url: the requested url.
+            :param response: AioResult or BrowserResponse.
+        """
+        if isinstance(response, BrowserResponse):
+            meta = {'kind': 'browser', 'cookies': response.cookies}
+            body = response.text.encode('utf-8')
+        else:
+            meta = {'kind': 'http', 'code': response.code, 'headers': list(response.header.items())}
+            body = response.content
+
+        meta['request_url'] = url
+        meta['url'] = response.url
+        meta = json.dumps(meta).encode('utf-8')
+
+        self.file.write(_head.pack(len(meta), len(body)))
+        self.file.write(meta)
+        self.file.write(body)
+
+    def get(self, url):
+        """
+            Return the recorded response (AioResult or BrowserResponse) of url, None if it is not recorded.
+        """
+        record = self.index.get(url)
+        if record is None:
+            return None
+
+        start, metaLength, bodyLength = record
+        meta = json.loads(self.map[start:start + metaLength].decode('utf-8'))
+        body = self.map[start + metaLength:start + metaLength + bodyLength]
+
+        if meta['kind'] == 'browser':
+            return BrowserResponse(meta['url'], body.decode('utf-8'), meta['cookies'])
+
+        return AioResult(meta['url'], body, CIMultiDict(meta['headers']), None, meta['code'])
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class ArchiveSession(object):
+    """
+        A session serves the recorded responses, used as the session of `fetch_content`.
+    """
+
+    def __init__(self, archive):
+        self.archive = archive
+
+    async def get(self, url, **kwargs):
+        response = self.archive.get(url)
+        if response is None:
+            return ErrorRequest(url=url,
+                                text='',
+                                content=b'',
+                                code='900',
+                                error_info='{} is not in the archive.'.format(url),
+                                error_type='missing')
+
+        return response
+
+    async def post(self, url, **kwargs):
+        return await self.get(url, **kwargs)
+
+    async def aclose(self):
+        pass
+
+
+class ArchiveBrowser(object):
+    """
+        A browser serves the recorded responses, used instead of `Browser`.
+    """
+
+    def __init__(self, archive):
+        self.archive = archive
+
+    async def launch(self):
+        pass
+
+    async def fetch(self, url, **kwargs):
+        response = self.archive.get(url)
+        if response is None:
+            return emptyBrowserResponse(url)
+
+        # recorded by http.
+        if not isinstance(response, BrowserResponse):
+            return BrowserResponse(response.url, response.text, [])
+
+        return response
+
+    async def close(self):
+        pass
@@ -9,7 +9,10 @@ Simple and effective.
 :)
 
 """
+import re
 import json
+import codecs
+import socket
 import logging
 import asyncio
 
@@ -29,7 +32,11 @@ except ImportError:
     else:
         noAiohttp = True
 
-import chardet
+# cchardet is much faster than chardet.
+try:
+    import cchardet as chardet
+except ImportError:
+    import chardet
 
 from collections import namedtuple
 
@@ -45,7 +52,134 @@ ErrorRequest = namedtuple('ErrorRequest',
                           'text',
                           'content',
                           'code',
-                          'error_info'])
+                          'error_info',
+                          'error_type',
+                          'status',
+                          'headers'])
+# error_type: 'timeout', 'dns', 'connection', 'status' (a status code to retry, see seen.retry),
+#             'empty' (the body is empty), 'skipped', 'streamed' or 'error' (other exceptions).
+# status and headers: of the response if there is one.
+ErrorRequest.__new__.__defaults__ = (None, None, None)
+
+# the codes of ErrorRequest:
+# 900: the body is empty.
+# 901: the body is larger than `max_body_size`.
+# 902: the content type is not one of `content_types`.
+# 903: the body has been streamed to the `stream` handler.
+EMPTY_BODY = '900'
+BODY_TOO_LARGE = '901'
+CONTENT_TYPE_NOT_ALLOWED = '902'
+STREAMED = '903'
+
+
+def classify_error(exception):
+    """
+        Return the error_type of the exception raised by a request.
+    """
+    if isinstance(exception, asyncio.TimeoutError):
+        return 'timeout'
+
+    # aiohttp keeps the socket error in os_error.
+    if isinstance(exception, socket.gaierror) or isinstance(getattr(exception, 'os_error', None), socket.gaierror):
+        return 'dns'
+
+    if not noAiohttp and isinstance(exception, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)):
+        return 'connection'
+
+    if not noRequests:
+        if isinstance(exception, requests.exceptions.Timeout):
+            return 'timeout'
+        if isinstance(exception, requests.exceptions.ConnectionError):
+            return 'connection'
+
+    if isinstance(exception, OSError):
+        return 'connection'
+
+    return 'error'
+
+
+def match_content_type(contentType, patterns):
+    """
+        Whether contentType (such as 'text/html') matches one of patterns (such as 'text/html' or 'text/*').
+    """
+    return any(contentType == i or (i.endswith('/*') and contentType.startswith(i[:-1])) for i in patterns)
+
+
+# the size of the head of body to find <meta charset>.
+SNIFF_SIZE = 4096
+# the size of the head of body to detect the charset statistically.
+DETECT_SIZE = 65536
+
+_headerCharset = re.compile(r'''charset\s*=\s*["']?([\w.:-]+)''', re.I)
+_metaCharset = re.compile(br'''<meta[^>]+charset\s*=\s*["']?\s*([\w.:-]+)''', re.I)
+_xmlCharset = re.compile(br'''^\s*<\?xml[^>]+encoding\s*=\s*["']([\w.:-]+)''', re.I)
+
+_boms = (
+    # UTF-32 before UTF-16, the BOM of UTF-16 LE is the head of UTF-32 LE's.
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+
+def _valid_encoding(encoding):
+    if not encoding:
+        return None
+
+    if isinstance(encoding, bytes):
+        encoding = encoding.decode('ascii', 'ignore')
+
+    try:
+        return codecs.lookup(encoding).name
+    except LookupError:
+        return None
+
+
+def sniff_encoding(content):
+    """
+        Find the encoding from the BOM, <meta charset> or <?xml encoding?> in the head of content.
+    """
+    for bom, encoding in _boms:
+        if content.startswith(bom):
+            return encoding
+
+    head = content[:SNIFF_SIZE]
+    for pattern in (_xmlCharset, _metaCharset):
+        match = pattern.search(head)
+        if match:
+            encoding = _valid_encoding(match.group(1))
+            if encoding:
+                return encoding
+
+    return None
+
+
+def detect_encoding(content, headers=None):
+    """
+        Return the encoding of content, in order of:
+        1. the charset of Content-Type header.
+        2. the BOM or <meta charset> in the first SNIFF_SIZE bytes.
+        3. chardet (cchardet if installed) over the first DETECT_SIZE bytes.
+    """
+    contentType = headers.get('Content-Type', '') if headers else ''
+    match = _headerCharset.search(contentType)
+    if match:
+        encoding = _valid_encoding(match.group(1))
+        if encoding:
+            return encoding
+
+    encoding = sniff_encoding(content)
+    if encoding:
+        return encoding
+
+    encoding = _valid_encoding(chardet.detect(content[:DETECT_SIZE])['encoding'])
+    # only the head was detected, the rest may not be ASCII.
+    if encoding == 'ascii':
+        return 'utf-8'
+
+    return encoding
 
 
 class AioResult(object):
@@ -57,6 +191,8 @@ class AioResult(object):
         self.cookies = cookies
         self.code = code
         self.encoding = encoding
+        # (encoding, text), decoded once.
+        self._text = None
 
     def __repr__(self):
 
@@ -65,15 +201,19 @@ class AioResult(object):
     @property
     def text(self):
         if not self.encoding:
-            encoding = chardet.detect(self.content)['encoding']
-            self.encoding = encoding
-        else:
-            encoding = self.encoding
-            
+            self.encoding = detect_encoding(self.content, self.header)
+
+        encoding = self.encoding
+        if self._text is not None and self._text[0] == encoding:
+            return self._text[1]
+
         try:
-            return str(self.content, encoding, errors='replace')
+            text = str(self.content, encoding, errors='replace')
         except (LookupError, TypeError):
-            return str(self.content, errors='replace')
+            text = str(self.content, errors='replace')
+
+        self._text = (encoding, text)
+        return text
 
     @property
     def json(self):
@@ -82,11 +222,19 @@ class AioResult(object):
 
 if not noRequests:
     class RequestsBase(object):
-        session = requests.session()
+
+        def __init__(self, session=None):
+            self.session = session if session is not None else requests.session()
 
         def __del__(self):
             self.session.close()
 
+        def close(self):
+            self.__del__()
+
+        async def aclose(self):
+            self.close()
+
         def get(self, url, **kwargs):
 
             return self.session.get(url, **kwargs)
@@ -102,15 +250,77 @@ if not noRequests:
 if not noAiohttp:
 
     class AioRequestsBase(object):
-        session = aiohttp.ClientSession()
+        """
+            :param session: aiohttp.ClientSession, a default one will be created when it is used if it is None.
+        """
+
+        def __init__(self, session=None):
+            self._session = session
+
+        @property
+        def session(self):
+            if self._session is None:
+                self._session = aiohttp.ClientSession()
+
+            return self._session
 
         def __del__(self):
-            if not self.session.closed:
+            if self._session is not None and not self.session.closed:
                 if self.session._connector_owner:
                     self.session._connector.close()
                 self.session._connector = None
 
+        async def _read(self, url, response, max_body_size=None, content_types=None, chunk_size=65536):
+            # check the headers before reading the body, and read it in chunks up to max_body_size.
+            if content_types is not None and 'Content-Type' in response.headers:
+                contentType = response.content_type
+                if not match_content_type(contentType, content_types):
+                    return ErrorRequest(url=url,
+                                        text='',
+                                        content=b'',
+                                        code=CONTENT_TYPE_NOT_ALLOWED,
+                                        error_info='content type {} is not allowed.'.format(contentType),
+                                        error_type='skipped',
+                                        status=response.status)
+
+            if max_body_size is None:
+                return await response.read()
+
+            tooLarge = ErrorRequest(url=url,
+                                    text='',
+                                    content=b'',
+                                    code=BODY_TOO_LARGE,
+                                    error_info='the body is larger than {} bytes.'.format(max_body_size),
+                                    error_type='skipped',
+                                    status=response.status)
+            if response.content_length is not None and response.content_length > max_body_size:
+                return tooLarge
+
+            chunks = []
+            size = 0
+            async for chunk in response.content.iter_chunked(chunk_size):
+                size += len(chunk)
+                if size > max_body_size:
+                    return tooLarge
+                chunks.append(chunk)
+
+            return b''.join(chunks)
+
         async def request(self, method, url, **kwargs):
+            """
+                :param max_body_size: the body larger than it (bytes) is not read, ErrorRequest(code='901') is returned.
+                :param content_types: the allowed content types, such as ('text/html', 'text/*'),
+                                      the body of others is not read, ErrorRequest(code='902') is returned.
+                :param stream: coroutine function(url, response) called with the aiohttp response before the body is read,
+                               it returns True if it has read the body (from `response.content`),
+                               then ErrorRequest(code='903') is returned. The streamed body is not limited by max_body_size,
+                               nor by the total timeout, only by `timeout` seconds between two reads.
+            """
+            readOptions = {
+                'max_body_size': kwargs.pop('max_body_size', None),
+                'content_types': kwargs.pop('content_types', None)
+            }
+            stream = kwargs.pop('stream', None)
             cookies = kwargs.get('cookies')
             if cookies is not None:
                 self.session._cookie_jar.update_cookies(cookies)
@@ -125,21 +335,45 @@ if not noAiohttp:
             else:
                 raise(TypeError('Unknow method.'))
 
-            if kwargs.get('timeout'):
-                timeout = kwargs.pop('timeout')
-                async with async_timeout.timeout(timeout):
-                    async with request(url, **kwargs) as response:
-                        content = await response.read()
-            else:
-                async with request(url, **kwargs) as response:
-                    content = await response.read()
-
-            if not content:
+            timeout = kwargs.pop('timeout', None) or None
+            if timeout is not None and stream is not None:
+                # a streamed body may take long, only the time between two reads is limited.
+                kwargs['timeout'] = aiohttp.ClientTimeout(total=None, sock_read=timeout)
+
+            # the timeout covers the headers and the body, but not the streamed body.
+            loop = asyncio.get_event_loop()
+            start = loop.time()
+            async with async_timeout.timeout(timeout):
+                response = await request(url, **kwargs)
+
+            try:
+                if stream is not None and await stream(url, response):
+                    return ErrorRequest(url=url,
+                                        text='',
+                                        content=b'',
+                                        code=STREAMED,
+                                        error_info='the body has been streamed.',
+                                        error_type='streamed',
+                                        status=response.status)
+
+                async with async_timeout.timeout(timeout and max(0, timeout - (loop.time() - start))):
+                    content = await self._read(url, response, **readOptions)
+            finally:
+                response.release()
+
+            if isinstance(content, ErrorRequest):
+                return content
+
+            # 304 Not Modified has no body.
+            if not content and response.status != 304:
                 return ErrorRequest(url=url,
                                                     text='',
                                                     content=content,
-                                                    code='900',
-                                                    error_info=str(response))
+                                                    code=EMPTY_BODY,
+                                                    error_info=str(response),
+                                                    error_type='empty',
+                                                    status=response.status,
+                                                    headers=response.headers)
 
             return AioResult(url,
                 content, 
@@ -162,6 +396,13 @@ if not noAiohttp:
             """
             self.__del__()
 
+        async def aclose(self):
+            """
+                Close the session in a coroutine.
+            """
+            if self._session is not None and not self.session.closed:
+                await self.session.close()
+
 
     BaseHttp = AioRequestsBase
 
@@ -178,6 +419,12 @@ class AsRequests(BaseHttp):
     :param exceptionHandler: exception handling function. 
     :param exceptionHandler default: lambda exception: print(exception)
     
+    :param session: the session (aiohttp.ClientSession or requests.Session) to use,
+                    a default one is used if it is None.
+
+    :param retain: keep the tasks in `tasks` and the responses in `result` (by the default callback).
+                   False for long running use (such as spider), the responses are only returned.
+
     :param callbackMode: The type of callback function.
     :param callbackMode accept:
         1(or != 2,3) : callback function is a normal function.
@@ -225,6 +472,12 @@ class AsRequests(BaseHttp):
         <Response [200]>
         <Response [200]>
 
+    Batch Usage::
+        # the responses are returned as they complete, at most `limit` requests at the same time,
+        # they are not kept in `tasks` or `result`.
+        for response in ar.as_completed(['https://github.com']*5, limit=2):
+            print(response)
+
     Coroutine Usage::
         import asyncio
         urls = ['https://github.com']*5
@@ -264,16 +517,17 @@ class AsRequests(BaseHttp):
         url: https://github.com, response: <Response [200]>
         ....
     """
-    def __init__(self, callback=None, exceptionHandler=None, callbackMode=1):
-        super().__init__()
+    def __init__(self, callback=None, exceptionHandler=None, callbackMode=1, session=None, retain=True):
+        super().__init__(session)
         
         self.callbackMode = callbackMode
+        self.retain = retain
 
         # default callback result.
         self.tasks = []
         self.result = []
 
-        self.callback = callback if callback else lambda response: self.result.append(response)
+        self.callback = callback if callback else self._keepResult
 
         # if callback function has blocking codes.
         self.blockingCallbackTasks = []
@@ -317,6 +571,10 @@ class AsRequests(BaseHttp):
 
         return '<AsRequests: tasks: {tasks}>'.format(tasks=self.tasks)
 
+    def _keepResult(self, response):
+        if self.retain:
+            self.result.append(response)
+
     def _httpRequest(self, method, url, kwargs):
         method = method.upper()
         if method == 'GET':
@@ -327,8 +585,11 @@ class AsRequests(BaseHttp):
         return data
 
     @asyncio.coroutine
-    def _aHttpRequest(self, method, url, kwargs):
+    def _aHttpRequest(self, method, url, kwargs, callback=True):
         eventLoop = asyncio.get_event_loop()
+        # nothing to do with the response.
+        if not self.retain and self.callback == self._keepResult:
+            callback = False
 
         if not noAiohttp:
             future = self._httpRequest(method, url, kwargs)
@@ -341,14 +602,19 @@ class AsRequests(BaseHttp):
 
         try:
             data = yield from future
+        except asyncio.CancelledError:
+            # the task is cancelled (the spider is stopping), it is not a failed request.
+            raise
         except Exception as e:
             data = ErrorRequest(url=url,
                                 text='',
                                 content=b'',
                                 code='900',
-                                error_info=e)
+                                error_info=e,
+                                error_type=classify_error(e))
             self.exceptionHandler(e)
-        finally:
+
+        if callback:
             if self.callbackMode == 1:
                 eventLoop.call_soon_threadsafe(self.callback, data)
             if self.callbackMode == 3:
@@ -368,7 +634,8 @@ class AsRequests(BaseHttp):
 
     def _executeTasks(self):
         eventLoop = asyncio.get_event_loop()
-        eventLoop.run_until_complete(asyncio.wait(self.tasks))
+        if self.tasks:
+            eventLoop.run_until_complete(asyncio.wait(self.tasks))
 
         newLoop = asyncio.new_event_loop()
 
@@ -384,6 +651,29 @@ class AsRequests(BaseHttp):
 
         asyncio.set_event_loop(eventLoop)
 
+    def as_completed(self, urls, method='GET', limit=100, **kwargs):
+        """
+        Send requests to urls and yield the responses (or ErrorRequests) as they complete,
+        at most `limit` requests are sent at the same time.
+        The responses do not go through the callback and are not kept, so urls can be a long iterator.
+        """
+        eventLoop = asyncio.get_event_loop()
+        urls = iter(urls)
+        pending = set()
+        while True:
+            for url in urls:
+                pending.add(asyncio.ensure_future(self._aHttpRequest(method, url, dict(kwargs), callback=False)))
+                if len(pending) >= limit:
+                    break
+
+            if not pending:
+                return
+
+            done, pending = eventLoop.run_until_complete(
+                asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED))
+            for future in done:
+                yield future.result()
+
     def setCallback(self, func):
         self.callback = func
 
@@ -395,7 +685,8 @@ class AsRequests(BaseHttp):
         check out 'http://docs.python-requests.org/en/master/' getting help.
         """
         future = asyncio.ensure_future(self._get(url, **kwargs))
-        self.tasks.append(future)
+        if self.retain:
+            self.tasks.append(future)
 
         return future
 
@@ -404,11 +695,38 @@ class AsRequests(BaseHttp):
         check out 'http://docs.python-requests.org/en/master/' getting help.
         """
         future = asyncio.ensure_future(self._post(url, **kwargs))
-        self.tasks.append(future)
+        if self.retain:
+            self.tasks.append(future)
 
         return future
 
 
+def new_session(limit=100, limit_per_host=0, keepalive_timeout=15, dns_cache_ttl=10, **kwargs):
+    """
+    Return an AsRequests with its own session, the connections are pooled by the connector.
+
+    :param limit: total number of simultaneous connections, 0 for no limit.
+    :param limit_per_host: number of simultaneous connections to the same host, 0 for no limit.
+    :param keepalive_timeout: seconds to keep an idle connection alive.
+    :param dns_cache_ttl: seconds to cache the DNS results, None to cache them forever.
+
+    It has to be called in a coroutine when it uses aiohttp.
+    """
+    if noAiohttp:
+        session = requests.session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=limit_per_host or limit or 10)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+    else:
+        connector = aiohttp.TCPConnector(limit=limit,
+                                         limit_per_host=limit_per_host,
+                                         keepalive_timeout=keepalive_timeout,
+                                         ttl_dns_cache=dns_cache_ttl)
+        session = aiohttp.ClientSession(connector=connector)
+
+    return AsRequests(session=session, **kwargs)
+
+
 asrequests = AsRequests()
 
 
@@ -2,12 +2,14 @@ class BrowserResponse:
 
     """
         url, text(HTML), cookies.
+        extracted: the results of the selectors and the links extracted in the page, see `Browser.fetch`.
     """
 
-    def __init__(self, url, text, cookies):
+    def __init__(self, url, text, cookies, extracted=None):
         self.url = url
         self.text = text
         self.cookies = cookies
+        self.extracted = extracted
 
     def __repr__(self):
 
@@ -0,0 +1,94 @@
+"""
+An HTTP cache on disk (SQLite) for re-crawls.
+
+The validators (ETag and Last-Modified) of responses are kept, and sent as
+If-None-Match and If-Modified-Since the next time, so unchanged pages come back as 304 without body.
+If `store_body` is True the bodies are kept too, so a 304 response can be replayed from the cache.
+
+Usage::
+    cache = HttpCache('cache.db', store_body=True)
+    headers = cache.conditional_headers('https://github.com')
+    >>> {'If-None-Match': '"abc"'}
+
+    cache.store(response)
+    cache.replay('https://github.com')
+    >>> <Response [200]>
+"""
+import json
+import sqlite3
+
+try:
+    from multidict import CIMultiDict
+except ImportError:
+    CIMultiDict = dict
+
+from .asrequests import AioResult
+
+
+class HttpCache(object):
+    """
+        :param path: the path of the SQLite database.
+        :param store_body: keep the bodies to replay them.
+    """
+
+    def __init__(self, path, store_body=False):
+        self.path = path
+        self.store_body = store_body
+        self.db = sqlite3.connect(path)
+        self.db.execute('PRAGMA journal_mode = WAL')
+        self.db.execute('PRAGMA synchronous = NORMAL')
+        with self.db:
+            self.db.execute('CREATE TABLE IF NOT EXISTS cache '
+                            '(url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, headers TEXT, body BLOB)')
+
+    def __repr__(self):
+        return '<HttpCache: {}>'.format(self.path)
+
+    def conditional_headers(self, url):
+        """
+            Return the headers to send for a conditional request of url, {} if it is not cached.
+        """
+        row = self.db.execute('SELECT etag, last_modified, body IS NOT NULL FROM cache WHERE url = ?',
+                              (url,)).fetchone()
+        # a 304 response cannot be replayed without the body.
+        if row is None or (self.store_body and not row[2]):
+            return {}
+
+        headers = {}
+        if row[0]:
+            headers['If-None-Match'] = row[0]
+        if row[1]:
+            headers['If-Modified-Since'] = row[1]
+
+        return headers
+
+    def store(self, response):
+        """
+            Keep the validators (and body) of a 200 response, the ones without validators are not kept.
+        """
+        if response.code != 200:
+            return
+
+        etag = response.header.get('ETag')
+        lastModified = response.header.get('Last-Modified')
+        if not etag and not lastModified:
+            return
+
+        body = response.content if self.store_body else None
+        headers = json.dumps(list(response.header.items())) if self.store_body else None
+        with self.db:
+            self.db.execute('INSERT OR REPLACE INTO cache (url, etag, last_modified, headers, body) '
+                            'VALUES (?, ?, ?, ?, ?)', (response.url, etag, lastModified, headers, body))
+
+    def replay(self, url):
+        """
+            Return the cached response (AioResult) of url, None if its body is not kept.
+        """
+        row = self.db.execute('SELECT headers, body FROM cache WHERE url = ?', (url,)).fetchone()
+        if row is None or row[1] is None:
+            return None
+
+        return AioResult(url, row[1], CIMultiDict(json.loads(row[0])), None, 200)
+
+    def close(self):
+        self.db.close()
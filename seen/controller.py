@@ -0,0 +1,127 @@
+"""
+An AIMD (additive increase, multiplicative decrease) controller of the number of URLs in flight,
+globally and per host.
+
+* Every response without congestion raises the limit by `increase / limit`,
+  that is about `increase` per `limit` responses.
+* A timeout, a connection error, a 429 or 5xx status, or a latency higher than
+  `latency_factor` times the lowest latency of the host, cuts the limit of the host by `decrease`,
+  at most once per `cooldown` seconds.
+* Only a timeout, a connection error, a 429 or 503 status cuts the global limit,
+  a slow but healthy host is not a congestion of the whole crawl.
+
+Usage::
+    controller = AIMDController(max_limit=20)
+    controller.limit
+    >>> 10
+
+    controller.record('github.com', latency=0.3, response=response)
+    controller.host_limit('github.com')
+"""
+import time
+
+
+class AIMDState(object):
+    __slots__ = ('limit', 'min_limit', 'max_limit', 'latency', 'baseline', 'decreased')
+
+    def __init__(self, initial, min_limit, max_limit):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        # the moving average of latency, and the lowest one.
+        self.latency = None
+        self.baseline = None
+        self.decreased = 0
+
+
+class AIMDController(object):
+    """
+        :param max_limit: the global limit at most (the number of workers).
+        :param min_limit: the limits at least.
+        :param initial: the global limit at first, half of max_limit if None.
+        :param host_max_limit: the limit of one host at most, max_limit if None.
+        :param host_initial: the limit of one host at first, half of host_max_limit if None.
+        :param increase: the limit grows about `increase` per `limit` responses.
+        :param decrease: the limit is multiplied by it on congestion.
+        :param latency_factor: a latency higher than `latency_factor` times the lowest one of the host
+                               is congestion of the host, None to ignore latency.
+        :param cooldown: seconds, the limit is cut at most once in it.
+    """
+
+    def __init__(self, max_limit, min_limit=1, initial=None, host_max_limit=None, host_initial=None,
+                 increase=1, decrease=0.5, latency_factor=3, cooldown=1):
+        self.min_limit = min_limit
+        self.host_max_limit = host_max_limit or max_limit
+        self.host_initial = host_initial or max(min_limit, self.host_max_limit // 2)
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.cooldown = cooldown
+
+        self.state = AIMDState(initial or max(min_limit, max_limit // 2), min_limit, max_limit)
+        # host: AIMDState
+        self.hosts = {}
+
+    def __repr__(self):
+        return '<AIMDController: limit: {} hosts: {}>'.format(self.limit, len(self.hosts))
+
+    @property
+    def limit(self):
+        return int(self.state.limit)
+
+    def _host_state(self, host):
+        state = self.hosts.get(host)
+        if state is None:
+            state = AIMDState(self.host_initial, self.min_limit, self.host_max_limit)
+            self.hosts[host] = state
+
+        return state
+
+    def host_limit(self, host):
+        state = self.hosts.get(host)
+        return self.host_initial if state is None else int(state.limit)
+
+    def _congested(self, response):
+        if getattr(response, 'error_type', None) in ('timeout', 'connection'):
+            return True
+
+        status = getattr(response, 'status', None) or getattr(response, 'code', None)
+        return isinstance(status, int) and (status == 429 or status >= 500)
+
+    def _overloaded(self, response):
+        # the congestion of the whole crawl.
+        if getattr(response, 'error_type', None) in ('timeout', 'connection'):
+            return True
+
+        status = getattr(response, 'status', None) or getattr(response, 'code', None)
+        return status in (429, 503)
+
+    def _update(self, state, latency, congested, now):
+        if latency is not None and not congested:
+            state.latency = latency if state.latency is None else state.latency * 0.8 + latency * 0.2
+            state.baseline = state.latency if state.baseline is None else min(state.baseline, state.latency)
+            if self.latency_factor is not None and state.latency > self.latency_factor * state.baseline:
+                congested = True
+
+        if congested:
+            if now - state.decreased >= self.cooldown:
+                state.limit = max(state.min_limit, state.limit * self.decrease)
+                state.decreased = now
+        else:
+            state.limit = min(state.max_limit, state.limit + self.increase / state.limit)
+
+    def record(self, host, latency, response):
+        """
+            :param latency: seconds the request took.
+            :param response: the response, ErrorRequest or None (failed).
+        """
+        now = time.monotonic()
+        # the latency is only compared with the one of the same host.
+        self._update(self.state, None, self._overloaded(response), now)
+        self._update(self._host_state(host), latency, self._congested(response), now)
+
+    def stats(self):
+        return {
+            'limit': self.limit,
+            'host_limits': {host: int(state.limit) for host, state in self.hosts.items()}
+        }
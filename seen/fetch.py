@@ -1,9 +1,23 @@
-from .asrequests import ErrorRequest
+from .asrequests import ErrorRequest, BODY_TOO_LARGE, CONTENT_TYPE_NOT_ALLOWED, STREAMED
 
 from .logger import logger
 
 
-async def fetch_content(url, session, **kwargs):
+async def fetch_content(url, session, cache=None, retry=None, **kwargs):
+    """
+        Return the response, ErrorRequest if failed (its error_type and status tell why),
+        False if the response is skipped by `max_body_size` or `content_types`,
+        or its body has been streamed (nothing to parse).
+
+        :param cache: HttpCache, send a conditional request if url is cached,
+                      if it is not modified, return the cached response if the cache keeps bodies, or False.
+        :param retry: RetryPolicy, the responses of its status codes (such as 503) are returned as ErrorRequest.
+    """
+    if cache is not None:
+        conditional = cache.conditional_headers(url)
+        if conditional:
+            kwargs['headers'] = dict(kwargs.get('headers') or {}, **conditional)
+
     method = kwargs.get('method') or 'GET'
     if method == 'GET':
         response = await session.get(url, **kwargs)
@@ -11,8 +25,33 @@ async def fetch_content(url, session, **kwargs):
         response = await session.post(url, **kwargs)
         
     if isinstance(response, ErrorRequest):
+        if response.code == STREAMED:
+            logger.info("url {} has been streamed.".format(url))
+            return False
+
+        if response.code in (BODY_TOO_LARGE, CONTENT_TYPE_NOT_ALLOWED):
+            logger.info("url {} is skipped: {}".format(url, response.error_info))
+            return False
+
         logger.error("url {} is an error url, error information: {}".format(url, response.error_info))
-        return None
+        return response
+
+    if retry is not None and retry.is_failure(response):
+        logger.error("url {} is an error url, status code: {}".format(url, response.code))
+        return ErrorRequest(url=url,
+                            text='',
+                            content=b'',
+                            code=str(response.code),
+                            error_info='status code {}'.format(response.code),
+                            error_type='status',
+                            status=response.code,
+                            headers=response.header)
+
+    if cache is not None:
+        if response.code == 304:
+            logger.info("url {} is not modified.".format(url))
+            return cache.replay(url) or False
+
+        cache.store(response)
         
     return response
-
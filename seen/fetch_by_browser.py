@@ -1,5 +1,8 @@
+import re
 import asyncio
 
+from urllib.parse import urlsplit
+
 from .browser_response import BrowserResponse, emptyBrowserResponse
 from .logger import logger
 try:
@@ -9,27 +12,202 @@ except ImportError:
     logger.error('please install pyppeteer first.')
 
 
+# run the selectors and find the links in the page, one round trip,
+# the results are the same as Css selectors' (the texts are joined and the spaces are squashed).
+# spec: {'items': [{name: [rule, attr]}], 'links': bool}
+EXTRACT_SCRIPT = '''(spec) => {
+    const select = (rule, attr) => {
+        let nodes;
+        try {
+            nodes = Array.from(document.querySelectorAll(rule));
+        } catch (e) {
+            return null;
+        }
+        if (attr === null) {
+            return nodes.map(i => i.textContent).join(' ').replace(/\\s+/g, ' ').trim();
+        }
+        return nodes.map(i => i.getAttribute(attr));
+    };
+
+    const links = [];
+    if (spec.links) {
+        for (const node of document.querySelectorAll('[href]')) {
+            const href = node.getAttribute('href').trim();
+            if (!href) {
+                continue;
+            }
+            try {
+                links.push(new URL(href, document.baseURI).href);
+            } catch (e) {}
+        }
+    }
+
+    return {
+        items: spec.items.map(selectors => {
+            const result = {};
+            for (const name in selectors) {
+                result[name] = select(selectors[name][0], selectors[name][1]);
+            }
+            return result;
+        }),
+        links: links
+    };
+}'''
+
+
+class PooledPage(object):
+    """
+        A page of the pool, and how many times it has been used.
+    """
+    __slots__ = ('page', 'uses', 'crashed', 'site')
+
+    def __init__(self, page):
+        self.page = page
+        self.uses = 0
+        self.crashed = False
+        # the site of the URL fetching, to tell the third-party requests.
+        self.site = None
+
+    def on_crash(self, *args):
+        self.crashed = True
+
+
+def get_site(host):
+    """
+        The last two labels of host, 'www.github.com' -> 'github.com'.
+    """
+    return '.'.join((host or '').split('.')[-2:])
+
+
 class Browser(object):
     """
-        Return a launcher with totalPageNum page(s).
-        
+        Return a launcher with a pool of `concurrency` pages,
+        the pages are reused by fetches, a page is replaced after `max_uses` fetches or when it crashes,
+        so the browser keeps `concurrency` tabs at most.
+
+        The requests of pages can be intercepted and blocked:
+        :param block_resources: the resource types to block, such as ('image', 'media', 'font', 'stylesheet').
+        :param block_urls: regexes, the requests whose URL matches one of them are blocked.
+        :param block_third_party: block the requests to the other sites than the page's.
+        :param wait_until: when the page is loaded, 'load', 'domcontentloaded', 'networkidle0' or 'networkidle2'.
+        The page itself is never blocked.
     """
-    def __init__(self):
+    def __init__(self, concurrency=4, max_uses=100, block_resources=None, block_urls=None,
+                 block_third_party=False, wait_until='load'):
 
         self.browser = None
+        self.concurrency = concurrency
+        self.max_uses = max_uses
+
+        self.block_resources = set(block_resources or ())
+        self.block_urls = re.compile('|'.join('(?:{})'.format(i) for i in block_urls)) if block_urls else None
+        self.block_third_party = block_third_party
+        self.intercept = bool(self.block_resources or self.block_urls or block_third_party)
+        self.wait_until = wait_until
+
+        # the idle pages, and the pages in use are `concurrency` at most.
+        self.idle = []
+        self.slots = asyncio.Semaphore(concurrency)
 
     async def launch(self):
         self.browser = await launch()
 
+    async def _new_page(self):
+        page = await self.browser.newPage()
+        pooled = PooledPage(page)
+        page.on('error', pooled.on_crash)
+        if self.intercept:
+            await page.setRequestInterception(True)
+            page.on('request', lambda request: asyncio.ensure_future(self._intercept(pooled, request)))
+
+        return pooled
+
+    def should_block(self, pooled, request):
+        if request.isNavigationRequest() and request.frame is pooled.page.mainFrame:
+            return False
+
+        if request.resourceType in self.block_resources:
+            return True
+
+        if self.block_urls is not None and self.block_urls.search(request.url):
+            return True
+
+        if self.block_third_party and pooled.site:
+            host = urlsplit(request.url).hostname or ''
+            if host != pooled.site and not host.endswith('.' + pooled.site):
+                return True
+
+        return False
+
+    async def _intercept(self, pooled, request):
+        try:
+            if self.should_block(pooled, request):
+                await request.abort()
+            else:
+                await request.continue_()
+        except NetworkError:
+            # the page has gone to another URL or been closed.
+            pass
+
+    async def acquire(self):
+        """
+            Return an idle page or a new one, wait if `concurrency` pages are in use.
+        """
+        await self.slots.acquire()
+        if self.idle:
+            return self.idle.pop()
+
+        try:
+            return await self._new_page()
+        except Exception:
+            self.slots.release()
+            raise
+
+    async def release(self, pooled):
+        pooled.uses += 1
+        try:
+            if pooled.crashed or pooled.uses >= self.max_uses or pooled.page.isClosed():
+                # replace it by a new page next time.
+                if not pooled.page.isClosed():
+                    await pooled.page.close()
+            else:
+                self.idle.append(pooled)
+        except Exception:
+            logger.error('failed to close the page.', exc_info=True)
+        finally:
+            self.slots.release()
+
     async def fetch(self, url, **kwargs):
+        """
+            :param extract: {'items': [{name: [rule, attr]}], 'links': bool, 'text': bool},
+                            run these Css selectors and find the links in the page,
+                            the results are in `response.extracted` ({'items': [result], 'links': [url]}),
+                            the HTML is only serialized if 'text' is True. None by default.
+        """
+        pooled = await self.acquire()
+        try:
+            return await self._fetch(pooled, url, **kwargs)
+        except NetworkError:
+            # the page is closed or crashed.
+            pooled.crashed = True
+            logger.error("the page crashed when it got {url}.".format(url=url), exc_info=True)
+            return emptyBrowserResponse(url)
+        finally:
+            await self.release(pooled)
+
+    async def _fetch(self, pooled, url, **kwargs):
         try:
             max_tries = kwargs.pop('max_tries')
         except KeyError:
             # default 3
             max_tries = 3
 
-        # Create a new page to load url.
-        page = await self.browser.newPage()
+        extract = kwargs.pop('extract', None)
+        extracted = None
+
+        page = pooled.page
+        pooled.site = get_site(urlsplit(url).hostname)
+        kwargs.setdefault('waitUntil', self.wait_until)
         try:
             logger.info("try to get {url} by browser.".format(url=url))
             await page.goto(url, **kwargs)
@@ -45,7 +223,11 @@ class Browser(object):
         url = page.url
         for i in range(max_tries):
             try:
-                text = await page.content()
+                if extract is None:
+                    text = await page.content()
+                else:
+                    extracted = await page.evaluate(EXTRACT_SCRIPT, extract)
+                    text = await page.content() if extract.get('text') else ''
                 cookies = await page.cookies()
                 break
             except NetworkError:
@@ -55,15 +237,17 @@ class Browser(object):
                 except TimeoutError:
                     pass
         else:
-            await page.close()
+            # the page may be broken, replace it.
+            pooled.crashed = True
 
             # text = <html><head></head><body></body></html>
             # means load failed.
 
             return emptyBrowserResponse(url)
 
-        return BrowserResponse(url=url, text=text, cookies=cookies)    
+        return BrowserResponse(url=url, text=text, cookies=cookies, extracted=extracted)
 
 
     async def close(self):
+        self.idle = []
         await self.browser.close()
@@ -0,0 +1,107 @@
+"""
+The disk part of the work queue (frontier) of spider, kept in a SQLite database.
+
+* URLs are spilled to the database when too many URLs are in memory, and loaded back later.
+* The checkpoint saves the pending URLs (in memory and in flight) and the state of spider
+  (the seen set for example), so a stopped crawl can be resumed.
+
+URLs are (url, depth, priority) tuples, higher priority URLs are loaded first,
+the pending URLs of the checkpoint are (url, depth, priority, tries), so the retries go on after a resume.
+
+Usage::
+    frontier = DiskFrontier('crawl.db')
+    frontier.spill([('https://github.com', 0, 0)])
+    frontier.load(10)
+    >>> [('https://github.com', 0, 0)]
+
+    frontier.checkpoint([('https://github.com', 0, 0)], {'seen_url': {'https://github.com'}})
+    frontier.restore()
+    >>> ([('https://github.com', 0, 0, 0)], {'seen_url': {'https://github.com'}})
+"""
+import pickle
+import sqlite3
+
+
+class DiskFrontier(object):
+
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute('PRAGMA journal_mode = WAL')
+        self.db.execute('PRAGMA synchronous = NORMAL')
+        with self.db:
+            self.db.execute('CREATE TABLE IF NOT EXISTS spill '
+                            '(id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT, depth INTEGER, priority REAL, '
+                            'loaded INTEGER DEFAULT 0)')
+            self.db.execute('CREATE INDEX IF NOT EXISTS spill_order ON spill (loaded, priority DESC, id)')
+            self.db.execute('CREATE TABLE IF NOT EXISTS pending '
+                            '(url TEXT, depth INTEGER, priority REAL, tries INTEGER DEFAULT 0)')
+            self.db.execute('CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value BLOB)')
+            # the databases created before tries was kept.
+            if 'tries' not in [i[1] for i in self.db.execute('PRAGMA table_info(pending)')]:
+                self.db.execute('ALTER TABLE pending ADD COLUMN tries INTEGER DEFAULT 0')
+
+    def __repr__(self):
+        return '<DiskFrontier: {}>'.format(self.path)
+
+    def count(self):
+        """
+            The number of spilled URLs have not been loaded.
+        """
+        return self.db.execute('SELECT COUNT(*) FROM spill WHERE loaded = 0').fetchone()[0]
+
+    def spill(self, urls):
+        with self.db:
+            self.db.executemany('INSERT INTO spill (url, depth, priority) VALUES (?, ?, ?)', urls)
+
+    def load(self, n):
+        """
+            Load n spilled URLs, the higher priority ones first.
+            They are kept until the next checkpoint, so they will not be lost if the crawl stops before it.
+        """
+        rows = self.db.execute('SELECT id, url, depth, priority FROM spill WHERE loaded = 0 '
+                               'ORDER BY priority DESC, id LIMIT ?', (n,)).fetchall()
+        if rows:
+            with self.db:
+                self.db.executemany('UPDATE spill SET loaded = 1 WHERE id = ?', ((i[0],) for i in rows))
+
+        return [i[1:] for i in rows]
+
+    def checkpoint(self, pending, state):
+        """
+            :param pending: the URLs in memory, in flight and waiting to retry, (url, depth, priority[, tries]).
+            :param state: {key: picklable value}
+        """
+        with self.db:
+            # the loaded URLs are in `pending` now or done.
+            self.db.execute('DELETE FROM spill WHERE loaded = 1')
+            self.db.execute('DELETE FROM pending')
+            self.db.executemany('INSERT INTO pending (url, depth, priority, tries) VALUES (?, ?, ?, ?)',
+                                ((tuple(i) + (0,))[:4] for i in pending))
+            self.db.executemany('INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)',
+                                ((key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL)) for key, value in state.items()))
+
+    def has_checkpoint(self):
+        return self.db.execute('SELECT COUNT(*) FROM state').fetchone()[0] > 0
+
+    def restore(self):
+        """
+            Return the pending URLs and the state of the last checkpoint,
+            the spilled URLs (loaded after the checkpoint as well) will be loaded again.
+        """
+        with self.db:
+            self.db.execute('UPDATE spill SET loaded = 0')
+
+        pending = self.db.execute('SELECT url, depth, priority, tries FROM pending').fetchall()
+        state = {key: pickle.loads(value) for key, value in self.db.execute('SELECT key, value FROM state')}
+
+        return pending, state
+
+    def clear(self):
+        with self.db:
+            self.db.execute('DELETE FROM spill')
+            self.db.execute('DELETE FROM pending')
+            self.db.execute('DELETE FROM state')
+
+    def close(self):
+        self.db.close()
@@ -1,9 +1,49 @@
 import json
+import asyncio
 
 from html import unescape
 
 from .logger import logger
-from .selector import Selector
+from .selector import Selector, get_document, parse_document
+
+
+def extract(selectors, html, doc=None):
+    """
+        Run the selectors over html and return the result dict.
+
+        The document is parsed once (if doc is not given) and shared by all the Css selectors,
+        Regex selectors still work on the (unescaped) text.
+        It only needs picklable arguments, so it can also be run in the parse executor.
+    """
+    result = {}
+    text = None
+    for name, selector in selectors.items():
+        if selector.use_document:
+            if doc is None:
+                doc = parse_document(html)
+            contents = selector.get_select(html, doc)
+        else:
+            if text is None:
+                text = unescape(html)
+            contents = selector.get_select(text)
+
+        if contents is None:
+            logger.error('selector "{}:{}" was error, please check again.'.format(
+                name, selector), exc_info=True)
+            continue
+
+        result[name] = contents
+
+    return result
+
+
+def load_json(html, url=''):
+    try:
+        return {'json': json.loads(html)}
+    except:
+        logger.error("The JSON contents returned by URL ({}) loaded failure, please check again.".format(
+            url), exc_info=True)
+        return {}
 
 
 class BaseItem(type):
@@ -32,43 +72,104 @@ class Item(metaclass=BaseItem):
         # asynchronous or synchronize
         def save(self):
             print(self.title)
+
+      or write the results to a sink in batches (see seen.sink), without `save`:
+
+      class MyItem(Item):
+        title = Css('title')
+        sink = JsonLinesSink('items.jsonl')
+
+      with `use_browser = 'auto'`, a page is fetched again by browser if one of the `required` fields is empty
+      (the content is rendered by JavaScript):
+
+      class MyItem(Item):
+        title = Css('title')
+        price = Css('.price')
+        required = ('price',)
+
+      :param result: the result extracted already (by the parse executor for example),
+                     selectors will not be run again if it is given.
     """
 
-    def __init__(self, spider, response, isJson=False):
+    sink = None
+    required = ()
+
+    def __init__(self, spider, response, isJson=False, result=None):
         self.html = response.text
-        self.result = {}
         self.spider = spider
         self.response = response
-        if isJson:
-            try:
-                self.result['json'] = json.loads(self.html)
-            except:
-                logger.error("The JSON contents returned by URL ({}) loaded failure, please check again.".format(
-                    response.url), exc_info=True)
+        self.doc = None
+        if result is not None:
+            self.result = result
+        elif isJson:
+            self.result = load_json(self.html, getattr(response, 'url', ''))
         else:
-            self.html = unescape(self.html)
+            # the document is parsed once and cached on the response.
+            if any(i.use_document for i in self.selector.values()):
+                self.doc = get_document(response)
 
-            for name, selector in self.selector.items():
-                contents = selector.get_select(self.html)
-                if contents is None:
-                    logger.error('selector "{}:{}" was error, please check again.'.format(
-                        name, selector), exc_info=True)
-                    continue
-
-                self.result[name] = contents
+            self.result = extract(self.selector, self.html, self.doc)
 
     def save(self):
+        if self.sink is not None:
+            self.sink.write(self.result)
+            return
 
         raise(TypeError('No save operation.'))
 
 
 # save binary data.
 class BinItem(object):
+    """
+      class Image(BinItem):
+        def save(self):
+            with open('image.png', 'wb') as f:
+                f.write(self.content)
+
+      stream mode, the body is not kept in memory, it is written to the disk in chunks as it arrives:
+
+      class Image(BinItem):
+        stream = True
+        # the responses of these content types are streamed to this item, None for all.
+        content_types = ('image/*', 'application/pdf')
+
+        # the built-in file sink writes the body to this path.
+        def file_path(self):
+            return os.path.join('images', os.path.basename(self.response.url))
 
-    def __init__(self, spider, response):
+        # or handle the chunks.
+        async def save_stream(self, chunks):
+            async for chunk in chunks:
+                ...
+
+      In stream mode `content` is None, `response.header` has the headers,
+      and the rules of parser are not used (they need the body).
+    """
+    stream = False
+    content_types = None
+    chunk_size = 65536
+
+    def __init__(self, spider, response, isJson=False):
         self.response = response
         self.spider = spider
-        self.content = response.content
+        self.content = None if self.stream else response.content
+
+    def file_path(self):
+
+        raise(TypeError('No file path.'))
+
+    async def save_stream(self, chunks):
+        """
+            :param chunks: async iterator of bytes, the body in chunks.
+        """
+        # the file is written in the thread pool, so the event loop is not blocked by the disk.
+        loop = asyncio.get_event_loop()
+        f = await loop.run_in_executor(None, open, self.file_path(), 'wb')
+        try:
+            async for chunk in chunks:
+                await loop.run_in_executor(None, f.write, chunk)
+        finally:
+            await loop.run_in_executor(None, f.close)
 
     def save(self):
 
@@ -0,0 +1,167 @@
+"""
+Match the content rules of all the parsers (`Parser(rule=...)` and `ReParser(rule=...)`) in one pass.
+
+The literal rules are put into an Aho-Corasick automaton (if pyahocorasick is installed),
+the regex rules (and the literals without pyahocorasick) into one alternation regex,
+so the page is scanned once for all the rules, instead of once per parser.
+The result is cached on the response, every rule of the matcher reads it.
+
+Usage::
+    rules = [ContentRule('price'), ContentRule(r'id="\\d+"', regex=True)]
+    matcher = ContentMatcher(rules)
+
+    matcher.match('<p>price</p>')
+    >>> {ContentRule('price')}
+
+    rules[0](response)
+    >>> True
+"""
+import re
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+# the regexes with back references, named groups (two rules may use the same name)
+# or global flags cannot be put into the alternation.
+_alone = re.compile(r'\\\d|\(\?P[<=]|\(\?[aiLmsux]+\)')
+
+
+class ContentRule(object):
+    """
+        A rule of the page content, `rule in response.text` or `re.search(rule, response.text)`.
+    """
+
+    def __init__(self, rule, regex=False):
+        self.rule = rule
+        self.regex = regex
+        # the ContentMatcher of this rule.
+        self.matcher = None
+        self.compiled = re.compile(rule) if regex else None
+
+    def __repr__(self):
+        return 'ContentRule({!r})'.format(self.rule)
+
+    def search(self, text):
+        if self.regex:
+            return self.compiled.search(text) is not None
+
+        return self.rule in text
+
+    def __call__(self, response):
+        if self.matcher is None:
+            return self.search(response.text)
+
+        return self in self.matcher.match_response(response)
+
+
+class ContentMatcher(object):
+    """
+        :param rules: ContentRule, each one is matched by this matcher since then.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        # literal: [rule]
+        self.literals = {}
+        # the rules matched by the alternation regex, and the ones searched one by one.
+        self.alternatives = []
+        self.alone = []
+
+        for rule in self.rules:
+            rule.matcher = self
+            if not rule.regex and ahocorasick is not None:
+                self.literals.setdefault(rule.rule, []).append(rule)
+            elif not rule.regex:
+                self.alternatives.append((re.compile(re.escape(rule.rule)), rule))
+            elif isinstance(rule.rule, str) and not _alone.search(rule.rule) and self._fits(rule.compiled):
+                self.alternatives.append((rule.compiled, rule))
+            else:
+                self.alone.append(rule)
+
+        self.automaton = None
+        if self.literals:
+            self.automaton = ahocorasick.Automaton()
+            for literal, rules in self.literals.items():
+                self.automaton.add_word(literal, rules)
+            self.automaton.make_automaton()
+
+        # compiled once, it is not changed by the rules matched.
+        self.alternation = re.compile(
+            '|'.join('(?:{})'.format(i.pattern) for i, rule in self.alternatives)) if self.alternatives else None
+        # the matches of the alternation read at most, the rules left are searched one by one then,
+        # so a rule matched all over the page does not cost a step per match.
+        self.max_hits = 2 * len(self.alternatives) + 8
+
+    def __repr__(self):
+        return '<ContentMatcher: {} rules>'.format(len(self.rules))
+
+    def _fits(self, compiled):
+        # whether the alternation still compiles with it, the alternations of fewer rules compile too.
+        try:
+            patterns = [i.pattern for i, rule in self.alternatives] + [compiled.pattern]
+            re.compile('|'.join('(?:{})'.format(i) for i in patterns))
+        except re.error:
+            return False
+
+        return True
+
+    def match(self, text):
+        """
+            Return the set of the rules matched in text.
+        """
+        matched = set()
+        if self.automaton is not None:
+            for end, rules in self.automaton.iter(text):
+                matched.update(rules)
+
+        # the leftmost match of the alternation, all the rules left are tried at its position,
+        # then the next search starts after it, until no rule is left or found.
+        left = list(self.alternatives)
+        pos = 0
+        hits = 0
+        while left and self.alternation is not None:
+            found = self.alternation.search(text, pos)
+            if found is None:
+                break
+
+            pos = found.start()
+            rest = []
+            for compiled, rule in left:
+                if compiled.match(text, pos):
+                    matched.add(rule)
+                else:
+                    rest.append((compiled, rule))
+
+            left = rest
+            pos += 1
+            hits += 1
+            if hits >= self.max_hits:
+                for compiled, rule in left:
+                    if compiled.search(text, pos):
+                        matched.add(rule)
+                break
+
+        for rule in self.alone:
+            if rule.search(text):
+                matched.add(rule)
+
+        return matched
+
+    def match_response(self, response):
+        """
+            Return the set of the rules matched in the text of response, matched once and cached on the response.
+        """
+        cached = getattr(response, '_matched', None)
+        if cached is not None and cached[0] is self:
+            return cached[1]
+
+        matched = self.match(response.text)
+        try:
+            response._matched = (self, matched)
+        except AttributeError:
+            pass
+
+        return matched
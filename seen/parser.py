@@ -3,8 +3,117 @@ import asyncio
 from html import unescape
 from urllib.parse import urljoin, urlparse
 
-from .logger import logger
-from .item import BinItem
+from .asrequests import match_content_type
+from .item import BinItem, extract, load_json
+from .matcher import ContentRule
+from .pipeline import save_item
+from .selector import Css, get_document, parse_document
+from .url import UrlJoiner, find_base
+
+
+# By default.
+DEFAULT_URL_RULE = r'''(?i)href=["']([^\s"'<>]+)'''
+
+
+def partial_url_or_not(url):
+    if re.match('(http|https)://', url):
+        return False
+    return True
+
+
+def parse_partial_url_to_full(partialUrl, baseUrl):
+    if partial_url_or_not(partialUrl):
+        # //cdn.xxx.com/avator/2.jpg
+        # to http://cdn.xxx.com/avator/2.jpg
+        if partialUrl.startswith('//'):
+            return urljoin('http:', partialUrl)
+        # /item?abc=123
+        # to http://root/item?abc=123
+        elif partialUrl.startswith('/'):
+            parse_base_url = urlparse(baseUrl)
+            return urljoin('{}://{}'.format(parse_base_url.scheme, parse_base_url.netloc), partialUrl)
+        # item?abc=123
+        # to http://root/toor/item?abc=123
+        else:
+            # http://root/toor/xxx.yyy
+            # to http://root/toor/
+            baseUrl = baseUrl[:baseUrl.rfind('/')+1]
+            return urljoin(baseUrl, partialUrl)
+    return partialUrl
+
+
+def find_urls(urlRule, html, baseUrl='', doc=None):
+    """
+        :param urlRule: None for the default rule, a str or a function.
+        :param doc: the parsed document of html, if given, the default rule
+                    reads the href attributes from it instead of scanning html again.
+
+        The URLs are joined to baseUrl (or <base href> of the page), without fragments,
+        the links of other schemes (javascript:, mailto:...) are dropped.
+    """
+    if doc is not None and urlRule is None:
+        urls = set(i.get('href').strip() for i in doc('[href]'))
+        urls.discard('')
+    elif urlRule is None:
+        urls = set(re.findall(DEFAULT_URL_RULE, html))
+    elif isinstance(urlRule, str):
+        urls = set(re.findall(urlRule, html))
+    else:
+        urls = set(urlRule(html))
+
+    # the attributes read from the document are unescaped, so are the ones found in html,
+    # '/x?a=1&amp;b=2' is '/x?a=1&b=2' either way.
+    if doc is None or urlRule is not None:
+        urls = set(unescape(i) for i in urls)
+
+    # the base is parsed once for all the links.
+    joiner = UrlJoiner(baseUrl, find_base(html, doc))
+    urls = set(joiner.join(i) for i in urls)
+    urls.discard(None)
+
+    return urls
+
+
+def get_links(response):
+    """
+        The URLs of a response found by the default rule,
+        they are found once and cached on the response, so the parsers of this response share them.
+    """
+    links = getattr(response, '_links', None)
+    if links is not None:
+        return links
+
+    links = list(find_urls(None, response.text, response.url, get_document(response, parse=False)))
+    try:
+        response._links = links
+    except AttributeError:
+        pass
+
+    return links
+
+
+def parse_page(selectors, isJson, urlRule, html, baseUrl):
+    """
+        Extract the item result and the URLs of a page, it runs in the parse executor,
+        so it only accepts picklable arguments and returns a plain dict.
+
+        :param selectors: the selectors of the item, None if no item is wanted.
+        :param urlRule: None for the default rule or a str, False if URLs are not wanted.
+    """
+    page = {'result': None, 'urls': []}
+    doc = None
+    if selectors is not None:
+        if isJson:
+            page['result'] = load_json(html, baseUrl)
+        else:
+            if any(i.use_document for i in selectors.values()):
+                doc = parse_document(html)
+            page['result'] = extract(selectors, html, doc)
+
+    if urlRule is not False and not isJson:
+        page['urls'] = list(find_urls(urlRule, html, baseUrl, doc))
+
+    return page
 
 
 class BaseParser(object):
@@ -16,18 +125,24 @@ class BaseParser(object):
                     if it is a str will use re.findall(urlRule, response.text)
                     if it is a function will use urlRule(response.text), the function expects returning an iterable object that contains URL.
                     By default it is r'''(?i)href=["']([^\s"'<>]+)'''.
+    :param urls: str or list[str], regexes of the URLs of the pages wanted by the item of this parser,
+                 the item is only extracted from them (the links of the other pages are still followed),
+                 see `seen.router`. None for all pages.
     """
 
-    def __init__(self, urlRule=None, item=None, rules=None, isJson=False):
+    def __init__(self, urlRule=None, item=None, rules=None, isJson=False, urls=None):
         # which spider own it.
         self.spider = None
 
         self.rules = rules or []
+        self.urls = [urls] if isinstance(urls, str) else list(urls or [])
         self.item = item
         self.isJson = isJson
 
+        # the default rule can use the parsed document instead of the regex.
+        self.defaultUrlRule = urlRule is None
         if urlRule is None:
-            urlRule = r'''(?i)href=["']([^\s"'<>]+)'''
+            urlRule = DEFAULT_URL_RULE
 
         self.urlRule = urlRule
 
@@ -39,69 +154,171 @@ class BaseParser(object):
         return item
 
     def _partial_url_or_not(self, url):
-        if re.match('(http|https)://', url):
-            return False
-        return True
+        return partial_url_or_not(url)
 
     def parse_partial_url_to_full(self, partialUrl, baseUrl):
-        if self._partial_url_or_not(partialUrl):
-            # //cdn.xxx.com/avator/2.jpg
-            # to http://cdn.xxx.com/avator/2.jpg
-            if partialUrl.startswith('//'):
-                return urljoin('http:', partialUrl)
-            # /item?abc=123
-            # to http://root/item?abc=123
-            elif partialUrl.startswith('/'):
-                parse_base_url = urlparse(baseUrl)
-                return urljoin('{}://{}'.format(parse_base_url.scheme, parse_base_url.netloc), partialUrl)
-            # item?abc=123
-            # to http://root/toor/item?abc=123
-            else:
-                # http://root/toor/xxx.yyy
-                # to http://root/toor/
-                baseUrl = baseUrl[:baseUrl.rfind('/')+1]
-                return urljoin(baseUrl, partialUrl)
-        return partialUrl
-
-    def get_urls(self, html, baseUrl=''):
+        return parse_partial_url_to_full(partialUrl, baseUrl)
+
+    def get_urls(self, html, baseUrl='', doc=None):
+        """
+            :param doc: the parsed document of html, if given, the default urlRule
+                        reads the href attributes from it instead of scanning html again.
+        """
         if self.isJson:
             return {}
 
-        if isinstance(self.urlRule, str):
-            urls = set(re.findall(self.urlRule, html))
-        else:
-            urls = set(self.urlRule(html))
+        return find_urls(None if self.defaultUrlRule else self.urlRule, html, baseUrl, doc)
+
+    async def save_item(self, item):
+        # the item is saved by the item pipeline of spider if it has one,
+        # this only waits when the pipeline is full.
+        pipeline = getattr(self.spider, 'pipeline', None)
+        if pipeline is not None:
+            await pipeline.put(item)
+            return
+
+        # whether it is async function or not, it will be run.
+        await save_item(item)
+
+    def needs_browser(self, response):
+        """
+            Whether the page wanted by the item of this parser misses one of the `required` fields,
+            so it should be fetched again by browser.
+        """
+        item = self.item
+        required = getattr(item, 'required', None)
+        if not required or self.isJson or issubclass(item, BinItem):
+            return False
 
-        urls = (self.parse_partial_url_to_full(i, baseUrl) for i in urls)
+        if self.rules and not any([i(response) for i in self.rules]):
+            return False
 
-        return urls
+        # only the required fields, the document is cached on the response for the parse later.
+        selectors = {name: item.selector[name] for name in required}
+        doc = get_document(response) if any(i.use_document for i in selectors.values()) else None
+        result = extract(selectors, response.text, doc)
+
+        return not all(result.get(name) for name in required)
+
+    def page_selectors(self):
+        """
+            The selectors of the item as {name: [rule, attr]}, to run them in the browser page,
+            None if they cannot be (no item, a Regex selector, a JSON or binary item).
+        """
+        item = self.item
+        if item is None or self.isJson or issubclass(item, BinItem):
+            return None
+
+        if not all(isinstance(i, Css) for i in item.selector.values()):
+            return None
+
+        return {name: [i.rule, i.attr] for name, i in item.selector.items()}
+
+    def want_stream(self, contentType):
+        """
+            Whether the responses of contentType are streamed to the BinItem of this parser,
+            the pages (HTML) are not streamed unless `content_types` of the item says so.
+        """
+        item = self.item
+        if item is None or not issubclass(item, BinItem) or not item.stream:
+            return False
 
-    async def analyze_response(self, response):
-        if any([i(response) for i in self.rules]) or not self.rules:
-            if self.item is not None:
-                item = self.parse_item(response)
-                try:
-                    # whether it is async function or not, it will be run
-                    # the difference between them is normal function will raise a TypeError.
-                    # For example:
-                    # def save():
-                    #      print('save me!')
-                    # will raise `TypeError: object NoneType can't be used in 'await' expression` but will also output "save me".
-                    #
-                    await item.save()
-                except Exception as e:
-                    if 'await' in str(e):
-                        logger.error(
-                            "Got some error when tried to save data, it seems because `item.save()` is not an async function.")
-                    else:
-                        logger.error(
-                            "Got some error when tried to save data, please check again, this is the error information:", exc_info=True)
-
-        if issubclass(self.item, BinItem):
+        if item.content_types is None:
+            return contentType not in ('text/html', 'application/xhtml+xml')
+
+        return match_content_type(contentType, item.content_types)
+
+    async def stream_response(self, response, chunks):
+        """
+            :param response: AioResult without content.
+            :param chunks: async iterator of bytes, the body.
+        """
+        await self.item(self.spider, response).save_stream(chunks)
+
+    async def parse_in_executor(self, executor, response, wantItem):
+        # a function urlRule may not be picklable, run it here.
+        urlRule = None if self.defaultUrlRule else self.urlRule
+        inExecutor = urlRule is None or isinstance(urlRule, str)
+
+        # Item classes may not be picklable, send their selectors only.
+        selectors = self.item.selector if wantItem else None
+
+        # the URLs found by another parser of this response.
+        links = getattr(response, '_links', None) if urlRule is None else None
+        if links is not None:
+            inExecutor = False
+
+        page = await asyncio.get_event_loop().run_in_executor(
+            executor, parse_page,
+            selectors,
+            self.isJson,
+            urlRule if inExecutor else False,
+            response.text,
+            response.url)
+
+        if links is not None:
+            page['urls'] = links
+        elif not inExecutor:
+            page['urls'] = self.get_urls(response.text, response.url)
+        elif urlRule is None and not self.isJson:
+            response._links = page['urls']
+
+        return page
+
+    def analyze_links(self, response):
+        """
+            Return the URLs of a page not routed to this parser, its item is not wanted but the links are followed.
+        """
+        if self.isJson or (self.item is not None and issubclass(self.item, BinItem)):
             return set()
 
+        if self.defaultUrlRule:
+            extracted = getattr(response, 'extracted', None)
+            return extracted['links'] if extracted is not None else get_links(response)
+
         return self.get_urls(response.text, response.url)
 
+    async def analyze_response(self, response):
+        wantItem = self.item is not None and (not self.rules or any([i(response) for i in self.rules]))
+
+        if self.item is not None and issubclass(self.item, BinItem):
+            # in stream mode, the item only gets the streamed responses, see `stream_response`.
+            if wantItem and not self.item.stream:
+                await self.save_item(self.parse_item(response))
+            return set()
+
+        # the selectors and links have been run in the browser page.
+        extracted = getattr(response, 'extracted', None)
+        if extracted is not None:
+            if wantItem:
+                result = extracted['items'].get(self)
+                if result is None:
+                    await self.save_item(self.parse_item(response))
+                else:
+                    await self.save_item(self.item(self.spider, response, self.isJson, result=result))
+
+            if self.defaultUrlRule and not self.isJson:
+                return extracted['links']
+
+            return self.get_urls(response.text, response.url)
+
+        # parse the page in the process pool if the spider has one.
+        executor = getattr(self.spider, 'parse_pool', None)
+        if executor is None:
+            if wantItem:
+                await self.save_item(self.parse_item(response))
+
+            if self.defaultUrlRule and not self.isJson:
+                return get_links(response)
+
+            return self.get_urls(response.text, response.url)
+
+        page = await self.parse_in_executor(executor, response, wantItem)
+        if wantItem:
+            await self.save_item(self.item(self.spider, response, self.isJson, result=page['result']))
+
+        return page['urls']
+
 
 class Parser(BaseParser):
     """
@@ -113,12 +330,13 @@ class Parser(BaseParser):
 
     """
 
-    def __init__(self, item=None, urlRule=None, rule=None, isJson=False):
+    def __init__(self, item=None, urlRule=None, rule=None, isJson=False, urls=None):
         super().__init__(
             urlRule,
             item,
-            rule and [lambda response: True if rule in response.text else False],
-            isJson)
+            rule and [ContentRule(rule)],
+            isJson,
+            urls)
 
 
 class ChromeParser(BaseParser):
@@ -138,13 +356,13 @@ class ReParser(BaseParser):
             True
     """
 
-    def __init__(self, urlRule=None, item=None, rule=None, isJson=False):
+    def __init__(self, urlRule=None, item=None, rule=None, isJson=False, urls=None):
         super().__init__(
             urlRule,
             item,
-            rule and [lambda response: True if re.search(
-                rule, response.text) else False],
-            isJson)
+            rule and [ContentRule(rule, regex=True)],
+            isJson,
+            urls)
 
 
 class FuncParser(BaseParser):
@@ -165,9 +383,10 @@ class FuncParser(BaseParser):
 
     """
 
-    def __init__(self, urlRule=None, item=None,  rule: iter=None, isJson=None):
+    def __init__(self, urlRule=None, item=None,  rule: iter=None, isJson=None, urls=None):
         super().__init__(
             urlRule,
             item,
             rule,
-            isJson)
+            isJson,
+            urls)
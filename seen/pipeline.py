@@ -0,0 +1,104 @@
+"""
+The item pipeline of spider, items are saved apart from the fetch workers.
+
+* Items are put into a bounded queue, the worker which parsed the page only waits
+  when the queue is full (backpressure onto fetching).
+* `concurrency` consumers save the items, so storage and network are tuned separately.
+* Synchronous `save` methods can run in a thread pool instead of blocking the event loop.
+
+Usage::
+    pipeline = ItemPipeline(maxsize=1000, concurrency=4, save_in_thread=True)
+    pipeline.start()
+
+    await pipeline.put(item)
+    ...
+    # wait until all the items are saved.
+    await pipeline.join()
+    await pipeline.close()
+"""
+import asyncio
+import inspect
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .logger import logger
+
+
+async def save_item(item, executor=None):
+    """
+        Save an item whether its `save` is an async function or not,
+        a synchronous `save` runs in executor if it is given.
+    """
+    try:
+        if asyncio.iscoroutinefunction(item.save) or executor is None:
+            result = item.save()
+        else:
+            result = await asyncio.get_event_loop().run_in_executor(executor, item.save)
+
+        if inspect.isawaitable(result):
+            await result
+    except Exception:
+        logger.error(
+            "Got some error when tried to save data, please check again, this is the error information:", exc_info=True)
+
+
+class ItemPipeline(object):
+    """
+        :param maxsize: the number of items waiting to be saved at most, `put` waits if it is full.
+        :param concurrency: the number of consumers saving items at the same time.
+        :param save_in_thread: run synchronous `save` methods in a thread pool.
+        :param thread_workers: the number of threads, it is `concurrency` if None.
+    """
+
+    def __init__(self, maxsize=1000, concurrency=1, save_in_thread=False, thread_workers=None):
+        self.queue = asyncio.Queue(maxsize)
+        self.concurrency = concurrency
+        self.executor = ThreadPoolExecutor(thread_workers or concurrency) if save_in_thread else None
+        self.consumers = []
+
+    def __repr__(self):
+        return '<ItemPipeline: {} items waiting>'.format(self.queue.qsize())
+
+    def start(self):
+        self.consumers = [asyncio.ensure_future(self._consume()) for _ in range(self.concurrency)]
+
+    async def _consume(self):
+        while True:
+            item = await self.queue.get()
+            if item is None:
+                # stopped by close.
+                self.queue.task_done()
+                return
+
+            try:
+                await save_item(item, self.executor)
+            finally:
+                self.queue.task_done()
+
+    async def put(self, item):
+        await self.queue.put(item)
+
+    async def join(self):
+        await self.queue.join()
+
+    async def close(self):
+        """
+            Let the consumers save the items left and stop,
+            the items are saved here if the consumers have been cancelled.
+        """
+        # a None per consumer after the items, an item being saved is not interrupted.
+        consumers = [i for i in self.consumers if not i.done()]
+        for _ in consumers:
+            await self.queue.put(None)
+        await asyncio.gather(*consumers, return_exceptions=True)
+        self.consumers = []
+
+        while not self.queue.empty():
+            item = self.queue.get_nowait()
+            if item is not None:
+                await save_item(item, self.executor)
+            self.queue.task_done()
+
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
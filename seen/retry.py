@@ -0,0 +1,93 @@
+"""
+Retry policies of failed requests.
+
+A failed request (ErrorRequest) is retried by its error_type, after an exponential backoff
+with full jitter, or after the `Retry-After` header if the server sends one.
+The spider puts the URL back into the work queue with the delay, so no worker waits for it.
+
+Usage::
+    policy = RetryPolicy(max_tries=4, base_delay=1, max_delay=60)
+
+    if policy.should_retry(error, tries):
+        delay = policy.delay(error, tries)
+"""
+import time
+import random
+
+from email.utils import parsedate_to_datetime
+
+
+# the status codes worth retrying, the others are taken as the content of the page.
+RETRY_STATUSES = (408, 429, 500, 502, 503, 504)
+# the error types worth retrying, 'status' is one of the statuses above,
+# the other errors (an empty body, a programming error...) are not likely to go away.
+RETRY_TYPES = ('timeout', 'dns', 'connection', 'status')
+
+
+def parse_retry_after(value):
+    """
+        Return the seconds of a Retry-After header (seconds or an HTTP date), None if it is invalid.
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+
+    try:
+        return max(0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class RetryPolicy(object):
+    """
+        :param max_tries: the number of tries of a URL at most.
+        :param base_delay: seconds, the delay of the n-th retry is random between 0 and base_delay * 2 ** (n - 1).
+        :param max_delay: seconds, the backoff is not longer than it.
+        :param max_retry_after: seconds, the Retry-After header is not followed if it is longer.
+        :param statuses: the status codes to retry.
+        :param types: the error types to retry.
+        :param type_tries: {error_type: max tries}, such as {'dns': 2}, a name seldom resolves soon.
+    """
+
+    def __init__(self, max_tries=4, base_delay=1, max_delay=60, max_retry_after=600,
+                 statuses=RETRY_STATUSES, types=RETRY_TYPES, type_tries=None):
+        self.max_tries = max_tries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.statuses = statuses
+        self.types = types
+        self.type_tries = {'dns': 2} if type_tries is None else type_tries
+
+    def __repr__(self):
+        return '<RetryPolicy: max_tries: {} base_delay: {}>'.format(self.max_tries, self.base_delay)
+
+    def is_failure(self, response):
+        """
+            Whether a response (not an ErrorRequest) should be taken as failed by its status code.
+        """
+        return getattr(response, 'code', None) in self.statuses
+
+    def should_retry(self, error, tries):
+        """
+            :param error: ErrorRequest.
+            :param tries: the number of tries done.
+        """
+        if error.error_type not in self.types:
+            return False
+
+        return tries < self.type_tries.get(error.error_type, self.max_tries)
+
+    def delay(self, error, tries):
+        """
+            The seconds to wait before the next try.
+        """
+        headers = error.headers
+        retryAfter = parse_retry_after(headers.get('Retry-After')) if headers else None
+        if retryAfter is not None and retryAfter <= self.max_retry_after:
+            return retryAfter
+
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (tries - 1)))
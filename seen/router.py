@@ -0,0 +1,77 @@
+"""
+Route responses to the parsers by URL.
+
+A parser may declare the URL patterns (regexes) of the pages it wants, `Parser(item, urls=[...])`,
+the patterns of all the parsers are compiled into one regex, each parser is a named group of it,
+so one match of the URL tells which parsers should extract their items, instead of every parser on every page.
+The links of a page are followed whether a parser is routed to it or not.
+The parsers without patterns are routed to every page.
+The patterns which cannot be put into one regex (back references, named groups, inline flags)
+are searched on their own.
+
+Usage::
+    router = ParserRouter([Parser(Post, urls=r'/t/\\d+'), Parser(Member, urls=r'/member/')])
+    router.route('https://www.v2ex.com/t/1')
+    >>> [<Parser ...Post>]
+"""
+import re
+
+from .matcher import _alone
+
+
+class ParserRouter(object):
+    """
+        :param parsers: the parsers, they are returned in this order.
+    """
+
+    def __init__(self, parsers):
+        self.parsers = list(parsers)
+        # (parser, the group name of its patterns, or the patterns searched on their own, or None for every page)
+        self.routes = []
+        groups = []
+        for index, parser in enumerate(self.parsers):
+            if not parser.urls:
+                self.routes.append((parser, None))
+                continue
+
+            # an invalid pattern raises here.
+            compiled = [re.compile(i) for i in parser.urls]
+            name = 'p{}'.format(index)
+            # every group is a lookahead at the start, so all of them are tried by one match.
+            group = '(?=(?P<{}>.*?(?:{})))?'.format(name, '|'.join(parser.urls))
+            if any(_alone.search(i) for i in parser.urls) or not self._fits(groups + [group]):
+                self.routes.append((parser, compiled))
+                continue
+
+            groups.append(group)
+            self.routes.append((parser, name))
+
+        self.rule = re.compile(''.join(groups)) if groups else None
+
+    def _fits(self, groups):
+        try:
+            re.compile(''.join(groups))
+        except re.error:
+            return False
+
+        return True
+
+    def __repr__(self):
+        return '<ParserRouter: {} parsers>'.format(len(self.parsers))
+
+    def route(self, url):
+        """
+            Return the parsers wanting url.
+        """
+        match = self.rule.match(url) if self.rule is not None else None
+        parsers = []
+        for parser, route in self.routes:
+            if route is None:
+                parsers.append(parser)
+            elif isinstance(route, str):
+                if match.group(route) is not None:
+                    parsers.append(parser)
+            elif any(i.search(url) for i in route):
+                parsers.append(parser)
+
+        return parsers
@@ -0,0 +1,373 @@
+import time
+import asyncio
+
+from heapq import heappush, heappop
+from itertools import count
+from collections import deque, namedtuple
+from urllib.parse import urlsplit
+
+
+# a URL in the work queue.
+# depth: the number of links from roots.
+# priority: higher priority URLs are fetched first.
+# tries: the number of failed tries, see `retry`.
+QueuedUrl = namedtuple('QueuedUrl', ['url', 'depth', 'priority', 'tries'])
+QueuedUrl.__new__.__defaults__ = (0,)
+
+
+class HostState(object):
+    """
+        The state of one host: pending URLs, token bucket and URLs in flight.
+    """
+    __slots__ = ('pending', 'tokens', 'updated', 'active', 'scheduled', 'key')
+
+    def __init__(self, burst):
+        # heap of (-priority, order, QueuedUrl)
+        self.pending = []
+        self.tokens = burst
+        self.updated = time.monotonic()
+        # number of URLs in flight.
+        self.active = 0
+        # whether the host is in the ready heap or the timer heap.
+        self.scheduled = False
+        # the key of the host in the ready heap, the other keys of it are out of date.
+        self.key = None
+
+
+class HostScheduler(object):
+    """
+        The work queue of spider, it hands out URLs whose host is ready now.
+
+        Every host has a token bucket, `rate` tokens per second and `burst` tokens at most,
+        fetching a URL takes one token, so a host is fetched `rate` times per second at most.
+        Of the ready hosts, the one has the highest priority URL is served first,
+        hosts with the same priority are served in turn,
+        so workers never sleep for one host while URLs of other hosts are ready.
+
+        :param rate: fetches per second per host, None for no limit.
+        :param burst: the number of fetches a host can take at once.
+        :param host_concurrency: the number of URLs of one host in flight at the same time, None for no limit.
+        :param get_host: function(url) return the host of url.
+        :param frontier: DiskFrontier, URLs are spilled to it if more than `memory_limit` URLs are in memory.
+        :param memory_limit: the number of URLs in memory at most.
+        :param controller: AIMDController, limits the URLs in flight globally and per host (with host_concurrency).
+
+        Usage::
+            scheduler = HostScheduler(rate=2, burst=1)
+            scheduler.put_nowait('https://github.com', depth=0, priority=0)
+
+            queued = await scheduler.get()
+            queued.url, queued.depth
+            ...
+            scheduler.task_done(queued.url)
+
+            # or put it back to be got again after 10 seconds.
+            scheduler.retry(queued.url, 10)
+
+            # wait until all URLs are done.
+            await scheduler.join()
+    """
+
+    def __init__(self, rate=None, burst=1, host_concurrency=None, get_host=None, frontier=None, memory_limit=100000,
+                 controller=None):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.host_concurrency = host_concurrency
+        self.controller = controller
+        self.get_host = get_host or (lambda url: urlsplit(url).netloc)
+
+        # host: (rate, burst)
+        self.host_rates = {}
+        # host: HostState
+        self.hosts = {}
+
+        # (-priority, order, host), hosts which can be fetched now.
+        self._ready = []
+        # (time, host), hosts waiting for a token.
+        self._timers = []
+        # (time, order, QueuedUrl), URLs to retry later.
+        self._delayed = []
+        self._getters = deque()
+        self._order = count()
+
+        # url: QueuedUrl, URLs got but not done.
+        self.in_flight = {}
+
+        self._size = 0
+        self._unfinished = 0
+        self._finished = asyncio.Event()
+        self._finished.set()
+
+        self.frontier = None
+        self.memory_limit = memory_limit
+        # the number of spilled URLs, and the ones have not been written.
+        self._spilled = 0
+        self._spill_buffer = []
+        if frontier is not None:
+            self.set_frontier(frontier, memory_limit)
+
+    def __repr__(self):
+        return '<HostScheduler: hosts: {} pending: {} spilled: {}>'.format(len(self.hosts), self._size, self._spilled)
+
+    def set_frontier(self, frontier, memory_limit=100000):
+        """
+            Spill URLs to frontier if more than `memory_limit` URLs are in memory,
+            the URLs have been spilled to it are taken as pending.
+        """
+        self.frontier = frontier
+        self.memory_limit = memory_limit
+
+        self._unfinished -= self._spilled
+        self._spilled = frontier.count()
+        self._unfinished += self._spilled
+        if self._unfinished:
+            self._finished.clear()
+
+    def flush(self):
+        """
+            Write the spilled URLs to frontier.
+        """
+        if self._spill_buffer:
+            self.frontier.spill([i[:3] for i in self._spill_buffer])
+            self._spill_buffer = []
+
+    def checkpoint(self, state):
+        """
+            Save the pending URLs and state (dict) to frontier.
+        """
+        self.flush()
+        self.frontier.checkpoint(self.pending_urls(), state)
+
+    def pending_urls(self):
+        """
+            The QueuedUrls in memory, in flight and waiting to retry (not the spilled ones).
+        """
+        urls = list(self.in_flight.values())
+        urls.extend(i[2] for i in self._delayed)
+        for state in self.hosts.values():
+            urls.extend(i[2] for i in state.pending)
+
+        return urls
+
+    def set_rate(self, host, rate, burst=1):
+        """
+            Set the rate and burst of a host.
+        """
+        self.host_rates[host] = (rate, max(burst, 1))
+
+    def get_rate(self, host):
+        return self.host_rates.get(host, (self.rate, self.burst))
+
+    def qsize(self):
+        return self._size + self._spilled + len(self._delayed)
+
+    def empty(self):
+        return self.qsize() == 0
+
+    def _refill(self, host, state):
+        rate, burst = self.get_rate(host)
+        if rate is None:
+            state.tokens = burst
+            return rate
+
+        now = time.monotonic()
+        state.tokens = min(burst, state.tokens + (now - state.updated) * rate)
+        state.updated = now
+        return rate
+
+    def _host_full(self, host, state):
+        limit = self.host_concurrency
+        if self.controller is not None:
+            hostLimit = self.controller.host_limit(host)
+            limit = hostLimit if limit is None else min(limit, hostLimit)
+
+        return bool(limit) and state.active >= limit
+
+    def _push_ready(self, host, state):
+        state.key = (state.pending[0][0], next(self._order))
+        heappush(self._ready, state.key + (host,))
+
+    def _schedule(self, host, state):
+        # put the host into the ready heap or the timer heap if it has URLs to fetch.
+        if state.scheduled or not state.pending:
+            return
+
+        # it will be scheduled again when one of its URLs is done.
+        if self._host_full(host, state):
+            return
+
+        state.scheduled = True
+        rate = self._refill(host, state)
+        if state.tokens >= 1:
+            self._push_ready(host, state)
+        else:
+            heappush(self._timers, (time.monotonic() + (1 - state.tokens) / rate, host))
+
+    def _wakeup_next(self):
+        while self._getters:
+            getter = self._getters.popleft()
+            if not getter.done():
+                getter.set_result(None)
+                break
+
+    def _load_spilled(self):
+        self.flush()
+        urls = self.frontier.load(max(1, self.memory_limit // 2))
+        self._spilled = self.frontier.count()
+        for queued in urls:
+            self._put(QueuedUrl(*queued))
+
+    def _get_ready(self):
+        if self._spilled and self._size < self.memory_limit // 2:
+            self._load_spilled()
+
+        now = time.monotonic()
+        while self._delayed and self._delayed[0][0] <= now:
+            self._put(heappop(self._delayed)[2])
+
+        while self._timers and self._timers[0][0] <= now:
+            host = heappop(self._timers)[1]
+            self._push_ready(host, self.hosts[host])
+
+        # wait until a URL in flight is done.
+        if self.controller is not None and len(self.in_flight) >= self.controller.limit:
+            return None
+
+        while self._ready:
+            priority, order, host = heappop(self._ready)
+            state = self.hosts[host]
+            if state.key != (priority, order):
+                continue
+
+            state.scheduled = False
+            state.key = None
+
+            if not state.pending:
+                continue
+
+            if self._host_full(host, state):
+                continue
+
+            self._refill(host, state)
+            if state.tokens < 1:
+                self._schedule(host, state)
+                continue
+
+            state.tokens -= 1
+            state.active += 1
+            self._size -= 1
+            queued = heappop(state.pending)[2]
+            self.in_flight[queued.url] = queued
+
+            # the rest URLs of this host.
+            self._schedule(host, state)
+
+            return queued
+
+        return None
+
+    def _next_delay(self):
+        times = [i[0][0] for i in (self._timers, self._delayed) if i]
+        if not times:
+            return None
+
+        return max(0, min(times) - time.monotonic())
+
+    def _put(self, queued):
+        host = self.get_host(queued.url)
+        state = self.hosts.get(host)
+        if state is None:
+            state = HostState(self.get_rate(host)[1])
+            self.hosts[host] = state
+
+        heappush(state.pending, (-queued.priority, next(self._order), queued))
+        self._size += 1
+
+        # a ready host got a higher priority URL.
+        if state.key is not None and state.pending[0][0] < state.key[0]:
+            self._push_ready(host, state)
+
+        self._schedule(host, state)
+        self._wakeup_next()
+
+    def put_nowait(self, url, depth=0, priority=0, tries=0):
+        """
+            :param tries: the number of tries done, a restored URL may have been tried.
+        """
+        self._unfinished += 1
+        self._finished.clear()
+
+        queued = QueuedUrl(url, depth, priority, tries)
+        if self.frontier is not None and self._size >= self.memory_limit:
+            # written in batches.
+            self._spill_buffer.append(queued)
+            self._spilled += 1
+            if len(self._spill_buffer) >= 1000:
+                self.flush()
+            return
+
+        self._put(queued)
+
+    async def put(self, url, depth=0, priority=0):
+        self.put_nowait(url, depth, priority)
+
+    async def get(self):
+        """
+            Wait until a URL whose host is ready and return its QueuedUrl.
+        """
+        while True:
+            queued = self._get_ready()
+            if queued is not None:
+                return queued
+
+            getter = asyncio.get_event_loop().create_future()
+            self._getters.append(getter)
+            try:
+                await asyncio.wait_for(getter, self._next_delay())
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                try:
+                    self._getters.remove(getter)
+                except ValueError:
+                    pass
+
+    def _release(self, url):
+        # a URL of the host is not in flight any more.
+        queued = self.in_flight.pop(url, None)
+
+        host = self.get_host(url)
+        state = self.hosts.get(host)
+        if state is not None:
+            state.active = max(0, state.active - 1)
+            self._schedule(host, state)
+            self._wakeup_next()
+
+        return queued
+
+    def retry(self, url, delay):
+        """
+            Put the URL got from `get` back, it is got again after `delay` seconds with `tries` + 1,
+            no worker waits for it. It is not done yet.
+        """
+        queued = self._release(url)
+        if queued is None:
+            return
+
+        heappush(self._delayed, (time.monotonic() + delay, next(self._order), queued._replace(tries=queued.tries + 1)))
+        # the getters may wait longer than the delay.
+        self._wakeup_next()
+
+    def task_done(self, url):
+        """
+            The URL got from `get` is done.
+        """
+        self._release(url)
+
+        self._unfinished -= 1
+        if self._unfinished <= 0:
+            self._unfinished = 0
+            self._finished.set()
+
+    async def join(self):
+        await self._finished.wait()
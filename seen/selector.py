@@ -3,10 +3,45 @@ import re
 from pyquery import PyQuery as pq
 
 
-class Selector(object):
+def parse_document(html):
+    """
+        Parse html into a PyQuery document, return None if it cannot be parsed.
+    """
+    try:
+        return pq(html)
+    except Exception:
+        return None
+
+
+def get_document(response, parse=True):
+    """
+        Get the parsed document of a response.
+
+        The document is parsed once and cached on the response,
+        so every selector (and parser) of this response shares the same tree.
+
+        :param parse: False to return the cached document only (None if it has not been parsed yet).
     """
+    doc = getattr(response, '_document', None)
+    if doc is not None or not parse:
+        return doc
+
+    doc = parse_document(response.text)
+    try:
+        response._document = doc
+    except AttributeError:
+        pass
+
+    return doc
+
 
+class Selector(object):
+    """
+        :param rule: selector rule.
+        :param attr: attribute name, None to get the text.
     """
+    # whether get_select needs the parsed document or only the raw text.
+    use_document = False
 
     def __init__(self, rule, attr=None):
         self.rule = rule
@@ -19,27 +54,32 @@ class Selector(object):
 
         return str(self)
 
-    def get_select(self, html):
+    def get_select(self, html, doc=None):
 
         raise TypeError('No selector.')
 
 
 class Css(Selector):
+    use_document = True
 
-    def get_select(self, html):
+    def get_select(self, html, doc=None):
+        # reuse the document if given.
+        if doc is None:
+            doc = parse_document(html)
+            if doc is None:
+                return None
 
-        html = pq(html)
         if self.attr is None:
             try:
-                return html(self.rule).text()
+                return doc(self.rule).text()
             except Exception as e:
                 return None
 
-        return [i.attr(self.attr) for i in html(self.rule).items()]
+        return [i.attr(self.attr) for i in doc(self.rule).items()]
 
 
 class Regex(Selector):
 
-    def get_select(self, html):
+    def get_select(self, html, doc=None):
 
         return re.findall(self.rule, html)
@@ -0,0 +1,187 @@
+"""
+Sinks collect the results of items and write them in batches,
+a batch is written when `batch_size` records are collected or the oldest one has waited `flush_interval` seconds.
+The records left are written when spider closes.
+
+Usage::
+    class MyItem(Item):
+        title = Css('title')
+        # Item.save writes the result to the sink.
+        sink = JsonLinesSink('items.jsonl')
+
+    sink = SqliteSink('items.db', table='pages', batch_size=500)
+    sink.write({'url': 'https://github.com', 'title': 'GitHub'})
+    sink.close()
+"""
+import csv
+import json
+import time
+import sqlite3
+import threading
+
+
+class BaseSink(object):
+    """
+        :param batch_size: the number of records of a batch.
+        :param flush_interval: seconds a record waits at most, None to flush by size only.
+    """
+
+    def __init__(self, batch_size=1000, flush_interval=5):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer = []
+        # the time the oldest record in buffer was written.
+        self.since = None
+        # items may be saved in threads.
+        self.lock = threading.RLock()
+
+    def __repr__(self):
+        return '<{}: {} records buffered>'.format(self.__class__.__name__, len(self.buffer))
+
+    def write(self, record):
+        """
+            :param record: dict.
+        """
+        with self.lock:
+            if not self.buffer:
+                self.since = time.monotonic()
+            self.buffer.append(record)
+
+            if len(self.buffer) >= self.batch_size:
+                self.flush()
+            else:
+                self.flush_if_due()
+
+    def flush_if_due(self):
+        with self.lock:
+            if (self.buffer and self.flush_interval is not None and
+                    time.monotonic() - self.since >= self.flush_interval):
+                self.flush()
+
+    def flush(self):
+        with self.lock:
+            if self.buffer:
+                records, self.buffer = self.buffer, []
+                try:
+                    self.write_batch(records)
+                except Exception:
+                    # keep the batch, it is written again by the next flush.
+                    self.buffer = records + self.buffer
+                    raise
+
+    def write_batch(self, records):
+        """
+            Write a batch of records, should be override.
+        """
+        raise(TypeError('No write operation.'))
+
+    def close(self):
+        self.flush()
+
+
+def _text(value):
+    # lists and dicts are written as JSON.
+    if isinstance(value, (list, tuple, dict)):
+        return json.dumps(value, ensure_ascii=False)
+
+    return value
+
+
+class JsonLinesSink(BaseSink):
+    """
+        Write records to a JSON lines file, one JSON object per line.
+    """
+
+    def __init__(self, path, batch_size=1000, flush_interval=5, encoding='utf-8'):
+        super().__init__(batch_size, flush_interval)
+        self.path = path
+        self.encoding = encoding
+        self.file = None
+
+    def write_batch(self, records):
+        if self.file is None:
+            self.file = open(self.path, 'a', encoding=self.encoding)
+
+        self.file.write(''.join(json.dumps(i, ensure_ascii=False) + '\n' for i in records))
+        self.file.flush()
+
+    def close(self):
+        super().close()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class CsvSink(BaseSink):
+    """
+        Write records to a CSV file.
+
+        :param fields: the columns, the keys of the first record if None.
+    """
+
+    def __init__(self, path, fields=None, batch_size=1000, flush_interval=5, encoding='utf-8'):
+        super().__init__(batch_size, flush_interval)
+        self.path = path
+        self.fields = fields
+        self.encoding = encoding
+        self.file = None
+        self.writer = None
+
+    def write_batch(self, records):
+        if self.writer is None:
+            if self.fields is None:
+                self.fields = list(records[0])
+
+            self.file = open(self.path, 'a', newline='', encoding=self.encoding)
+            self.writer = csv.DictWriter(self.file, self.fields, extrasaction='ignore')
+            # a new file.
+            if self.file.tell() == 0:
+                self.writer.writeheader()
+
+        self.writer.writerows({key: _text(value) for key, value in i.items()} for i in records)
+        self.file.flush()
+
+    def close(self):
+        super().close()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            self.writer = None
+
+
+class SqliteSink(BaseSink):
+    """
+        Insert records into a SQLite table with `executemany`, a transaction per batch.
+
+        :param fields: the columns, the keys of the first record if None.
+                       The table is created if it does not exist.
+    """
+
+    def __init__(self, path, table='items', fields=None, batch_size=1000, flush_interval=5):
+        super().__init__(batch_size, flush_interval)
+        self.path = path
+        self.table = table
+        self.fields = fields
+        self.db = None
+
+    def write_batch(self, records):
+        if self.db is None:
+            if self.fields is None:
+                self.fields = list(records[0])
+
+            # items may be saved in threads, the lock keeps one writer at a time.
+            self.db = sqlite3.connect(self.path, check_same_thread=False)
+            with self.db:
+                self.db.execute('CREATE TABLE IF NOT EXISTS "{}" ({})'.format(
+                    self.table, ', '.join('"{}"'.format(i) for i in self.fields)))
+
+        sql = 'INSERT INTO "{}" ({}) VALUES ({})'.format(
+            self.table, ', '.join('"{}"'.format(i) for i in self.fields), ', '.join('?' * len(self.fields)))
+        with self.db:
+            self.db.executemany(sql, (tuple(_text(i.get(key)) for key in self.fields) for i in records))
+
+    def close(self):
+        super().close()
+        if self.db is not None:
+            self.db.close()
+            self.db = None
@@ -1,19 +1,32 @@
 import re
+import time
 import asyncio
 
 from collections import MutableMapping
+from concurrent.futures import Executor, ProcessPoolExecutor
+from urllib.parse import urlsplit
 
-from .asrequests import asrequests
+from .archive import ArchiveBrowser, ArchiveSession, ResponseArchive
+from .asrequests import AioResult, ErrorRequest, asrequests, match_content_type, new_session
+from .cache import HttpCache
+from .controller import AIMDController
 
 from .logger import logger
+from .matcher import ContentMatcher, ContentRule
 from .fetch import fetch_content
+from .frontier import DiskFrontier
+from .pipeline import ItemPipeline
+from .retry import RETRY_STATUSES, RetryPolicy
+from .router import ParserRouter
+from .scheduler import HostScheduler
+from .url import canonicalize_url
+from .urlset import create_url_set
 
 try:
     from .fetch_by_browser import Browser
 except ImportError:
     Browser = False
 
-Queue = asyncio.Queue
 # requests = AsRequests()
 
 
@@ -26,7 +39,6 @@ class Spider(MutableMapping):
     #      pass this url.
     url_limit = set()
     parsers = []
-    error_urls = set()
 
     headers = {
         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -39,32 +51,184 @@ class Spider(MutableMapping):
     }
     cookies = {}
     concurrency = 3
+    # the connection pool of the session created in `crawl`.
+    # limit: total connections, limit_per_host: connections per host, 0 for no limit.
+    limit = 100
+    limit_per_host = 0
+    keepalive_timeout = 15
+    # seconds to cache DNS results, None to cache them forever.
+    dns_cache_ttl = 10
+    # the number of URLs of one host fetched at the same time,
+    # so one host cannot hold all the `concurrency` workers.
+    # None for no limit.
+    host_concurrency = None
+    # politeness, fetches per second of one host, None for no limit.
+    # host_burst: the number of fetches one host can take at once.
+    # host_rates: {host: rate or (rate, burst)} to set them for some hosts.
+    host_rate = None
+    host_burst = 1
+    host_rates = {}
+    # adjust the number of URLs in flight by AIMD (additive increase, multiplicative decrease),
+    # globally (up to `concurrency`) and per host (up to `host_concurrency` if it is set),
+    # by the latency, timeouts and 429/5xx responses, see `stats` for the current limits.
+    # False by default.
+    adaptive_concurrency = False
     max_tries = 4
     timeout = 30
+    # the failed requests (timeouts, connection errors, `retry_statuses`...) are tried again
+    # `max_tries` times at most, after an exponential backoff with jitter (seconds) or the Retry-After header,
+    # the URL is put back into the work queue with the delay, no worker waits for it.
+    retry_base_delay = 1
+    retry_max_delay = 60
+    retry_statuses = RETRY_STATUSES
+    # the responses are checked by their headers before the body is read,
+    # max_body_size: bytes, the larger bodies are not read (the body is read in chunks up to it).
+    # content_types: the allowed content types, such as ('text/html', 'application/json', 'text/*').
+    # the skipped URLs are not retried.
+    # None for no limit.
+    max_body_size = None
+    content_types = None
+    # the HTTP cache for re-crawls, the path of a SQLite database, None by default.
+    # the ETag and Last-Modified of responses are kept, and sent the next time,
+    # the pages not modified (304) are not parsed (so their links are not followed either),
+    # unless http_cache_replay is True, then the bodies are kept and the cached pages are parsed.
+    http_cache_path = None
+    http_cache_replay = False
+    # record the responses (of http and browser) into an archive file,
+    # or replay them from it without network, to try parsers quickly.
+    # archive_mode: 'record' or 'replay', None by default.
+    archive_path = None
+    archive_mode = None
+    # seconds between two fetches of the same host,
+    # it is used as `host_rate = 1 / interval` if `host_rate` is not set.
     interval = 0
-    work_queue = Queue()
-    seen_url = set()
+    # how to keep the seen URLs (and error URLs):
+    # 'set': a Python set of URLs.
+    # 'fingerprint': exact, 8 bytes fingerprints in an array.
+    # 'bloom': a scalable Bloom filter, a few bytes per URL, a URL may be taken as seen
+    #          with `seen_error_rate` probability.
+    # seen_capacity: the number of URLs expected, the sets grow if more.
+    seen_backend = 'set'
+    seen_capacity = 100000
+    seen_error_rate = 0.001
+    # URLs are normalized before they are checked and queued, so one page is not queued under different spellings:
+    # the fragment is stripped, the scheme and host are lowercased, the default port is removed.
+    # url_sort_query: sort the query parameters.
+    # url_drop_params: the names of query parameters to remove, such as ('utm_source', 'utm_medium').
+    url_sort_query = False
+    url_drop_params = None
+    # the depth of roots is 0, the URLs found in a page of depth n are depth n + 1,
+    # URLs deeper than max_depth are not crawled, None for no limit.
+    max_depth = None
+    # keep the work queue (frontier) on disk, the path of a SQLite database.
+    # URLs are spilled to it if more than `frontier_memory_limit` URLs are in memory,
+    # the pending URLs and the seen URLs are saved every `checkpoint_interval` seconds and when spider closes,
+    # so `start(resume=True)` continues the last crawl.
+    # None by default.
+    frontier_path = None
+    frontier_memory_limit = 100000
+    checkpoint_interval = 60
     # save
     state = {}
 
     # load JavaScript.
     # True to startup.
+    # 'auto' to fetch by http first, and fetch again by browser only when `needs_browser` says so.
     # False by default.
     use_browser = False
+    # with use_browser = 'auto':
+    # browser_urls: regexes, the URLs matching one of them are fetched by browser directly.
+    # browser_markers: strings, a page missing one of them is fetched again by browser,
+    # so is a page missing the `required` fields of an item (see Item).
+    # browser_remember: 'host' or 'path' (host and directory), the hosts or paths which needed the browser
+    # are remembered, their later URLs are fetched by browser directly, None to not remember.
+    browser_urls = None
+    browser_markers = None
+    browser_remember = 'host'
+    # the number of browser pages (tabs) fetching at the same time, apart from `concurrency`,
+    # a page is replaced by a new one after `browser_page_uses` fetches or when it crashes.
+    browser_concurrency = 4
+    browser_page_uses = 100
+    # block the requests of browser pages which are not needed by the items:
+    # browser_block_resources: resource types, such as ('image', 'media', 'font', 'stylesheet').
+    # browser_block_urls: regexes of URLs, such as trackers.
+    # browser_block_third_party: block the requests to the other sites.
+    # browser_wait_until: 'load', 'domcontentloaded', 'networkidle0' or 'networkidle2'.
+    browser_block_resources = None
+    browser_block_urls = None
+    browser_block_third_party = False
+    browser_wait_until = 'load'
+    # run the Css selectors of items and find the links in the browser page,
+    # only the results are sent back, the HTML is not serialized and parsed again,
+    # unless a parser still needs it (rules, urlRule, Regex selectors, JSON items) or the archive records it.
+    # False by default.
+    browser_extract = False
+
+    # parse pages (selectors and URLs) in a process pool,
+    # so parsing a large page does not stall fetching.
+    # True to use a ProcessPoolExecutor with `parse_workers` processes (CPU count by default),
+    # or give an Executor directly.
+    # False by default.
+    parse_executor = False
+    parse_workers = None
+
+    # the item pipeline, items are saved by `save_concurrency` consumers apart from the fetch workers,
+    # at most `item_queue_size` items wait to be saved, then the workers wait (backpressure).
+    # save_in_thread: run synchronous `save` methods in a thread pool (`save_concurrency` threads),
+    # so they do not block the event loop.
+    item_queue_size = 1000
+    save_concurrency = 1
+    save_in_thread = False
 
     def __init__(self):
         self.session = asrequests
-        if isinstance(self.roots, str):
-            logger.info('get root url: {}'.format(self.roots))
-            self.work_queue.put_nowait(self.roots)
-        else:
-            for root in self.roots:
-                logger.info('get root url: {}'.format(root))
-                self.work_queue.put_nowait(root)
+        # the executor used by parsers, created in `crawl`.
+        self.parse_pool = None
+        # AIMDController if `adaptive_concurrency` is True.
+        self.controller = self.create_controller()
+        self.work_queue = self.create_work_queue()
+        self.retry_policy = self.create_retry_policy()
+        # URLs which have been put into the work queue (pending, in flight, done or failed),
+        # a URL is only put once.
+        self.seen_url = self.create_url_set()
+        # URLs which cannot be opened.
+        self.error_urls = self.create_url_set()
+        # DiskFrontier, opened in `crawl` if `frontier_path` is set.
+        self.frontier = None
+        # ItemPipeline, created in `crawl`.
+        self.pipeline = None
+        # HttpCache, opened in `crawl` if `http_cache_path` is set.
+        self.http_cache = None
+        # ResponseArchive, opened in `crawl` if `archive_mode` is set.
+        self.archive = None
+        # with use_browser = 'auto', the URLs fetched by browser directly,
+        # and the hosts or paths which needed the browser.
+        self.browser_urls_rule = re.compile(
+            '|'.join('(?:{})'.format(i) for i in self.browser_urls)) if self.browser_urls else None
+        self.browser_keys = set()
+        # with browser_extract, the parsers whose items are extracted in the page,
+        # and the spec for `Browser.fetch`, created in `init_browser`.
+        self.extract_parsers = []
+        self.extract_spec = None
 
         # given .spider attribute for parser.
         for parser in self.parsers:
             parser.spider = self
+        # the parsers of a response are found by its URL,
+        # and the content rules of them are matched in one pass.
+        self.router = ParserRouter(self.parsers)
+        self.matcher = self.create_matcher()
+
+        # the sinks of items, flushed when spider closes.
+        self.sinks = []
+        for parser in self.parsers:
+            sink = getattr(parser.item, 'sink', None)
+            if sink is not None and sink not in self.sinks:
+                self.sinks.append(sink)
+
+        # parsers with a BinItem in stream mode.
+        self.stream_parsers = [i for i in self.parsers
+                               if i.item is not None and getattr(i.item, 'stream', False)]
 
     def __setitem__(self, key, value):
         self.state[key] = value
@@ -82,14 +246,22 @@ class Spider(MutableMapping):
         return len(self.state)
 
     def add_roots(self, roots: iter):
+        roots = list(roots)
         for root in roots:
             logger.info('Got root URL: {}'.format(root))
-            self.work_queue.put_nowait(root)
+        self._add_url_to_workqueue(roots)
 
     def add_parsers(self, parsers: iter):
+        parsers = list(parsers)
         for parser in parsers:
-            logger.info('Got root URL: {}'.format(root))
-            self.work_queue.put_nowait(root)
+            parser.spider = self
+        self.parsers = self.parsers + parsers
+        self.router = ParserRouter(self.parsers)
+        self.matcher = self.create_matcher()
+
+    def create_matcher(self):
+        rules = [rule for parser in self.parsers for rule in parser.rules if isinstance(rule, ContentRule)]
+        return ContentMatcher(rules) if rules else None
 
     def get_host(self, url):
         host = re.search(r'://(.*?)/', url)
@@ -101,9 +273,146 @@ class Spider(MutableMapping):
 
         return host.group(1)
 
-    def _add_url_to_workqueue(self, urls: iter):
+    def create_work_queue(self):
+        """
+            Return the work queue, a HostScheduler limits `host_rate` and `host_concurrency` of each host.
+        """
+        rate = self.host_rate
+        if rate is None and self.interval:
+            rate = 1 / self.interval
+
+        work_queue = HostScheduler(rate=rate,
+                                   burst=self.host_burst,
+                                   host_concurrency=self.host_concurrency,
+                                   get_host=self.get_host,
+                                   controller=self.controller)
+        for host, rate in self.host_rates.items():
+            if isinstance(rate, (tuple, list)):
+                work_queue.set_rate(host, *rate)
+            else:
+                work_queue.set_rate(host, rate)
+
+        return work_queue
+
+    def init_frontier(self, resume=False):
+        """
+            Open the frontier database, return True if the last crawl is resumed.
+        """
+        if not self.frontier_path:
+            return False
+
+        self.frontier = DiskFrontier(self.frontier_path)
+        resumed = resume and self.frontier.has_checkpoint()
+        if resumed:
+            pending, state = self.frontier.restore()
+            self.seen_url = state.get('seen_url', self.seen_url)
+            self.error_urls = state.get('error_urls', self.error_urls)
+        else:
+            self.frontier.clear()
+
+        self.work_queue.set_frontier(self.frontier, self.frontier_memory_limit)
+        if resumed:
+            for url, depth, priority, tries in pending:
+                self.work_queue.put_nowait(url, depth, priority, tries)
+
+            logger.info('Resume the last crawl, {} URLs are pending.'.format(self.work_queue.qsize()))
+
+        return resumed
+
+    def checkpoint(self):
+        """
+            Save the pending URLs and the seen URLs to the frontier.
+        """
+        if self.frontier is None:
+            return
+
+        self.work_queue.checkpoint({'seen_url': self.seen_url, 'error_urls': self.error_urls})
+        logger.info('Checkpoint saved, {} URLs are pending.'.format(self.work_queue.qsize()))
+
+    def create_controller(self):
+        if not self.adaptive_concurrency:
+            return None
+
+        return AIMDController(self.concurrency, host_max_limit=self.host_concurrency)
+
+    def stats(self):
+        """
+            Return the numbers of the crawl.
+        """
+        stats = {
+            'queued': self.work_queue.qsize(),
+            'in_flight': len(self.work_queue.in_flight),
+            'seen': len(self.seen_url),
+            'errors': len(self.error_urls),
+            'concurrency': self.concurrency
+        }
+        if self.controller is not None:
+            stats['concurrency'] = self.controller.limit
+            stats['host_concurrency'] = self.controller.stats()['host_limits']
+
+        return stats
+
+    def create_retry_policy(self):
+        return RetryPolicy(self.max_tries, self.retry_base_delay, self.retry_max_delay, statuses=self.retry_statuses)
+
+    async def _checkpoint_periodically(self):
+        try:
+            while True:
+                await asyncio.sleep(self.checkpoint_interval)
+                self.checkpoint()
+        except asyncio.CancelledError:
+            pass
+
+    async def _flush_sinks_periodically(self):
+        # the records waited `flush_interval` are written even if no more items come.
+        try:
+            while True:
+                await asyncio.sleep(1)
+                for sink in self.sinks:
+                    try:
+                        sink.flush_if_due()
+                    except Exception:
+                        logger.error('failed to write the records of {}.'.format(sink), exc_info=True)
+        except asyncio.CancelledError:
+            pass
+
+    def create_url_set(self):
+        return create_url_set(self.seen_backend, self.seen_capacity, self.seen_error_rate)
+
+    def priority(self, url, depth, parent_response):
+        """
+            Return the priority of a URL, higher priority URLs are fetched first.
+            Should be override, 0 by default (URLs are fetched in order).
+
+            :param depth: the depth of url.
+            :param parent_response: the response url found in, None for roots.
+
+            For example, fetch the detail pages first and the shallow pages before the deep pages:
+            def priority(self, url, depth, parent_response):
+                if '/item/' in url:
+                    return 10
+                return -depth
+        """
+        return 0
+
+    def _add_url_to_workqueue(self, urls: iter, depth=0, parent_response=None):
+        # check URLs before they are queued, so duplicate URLs are never queued or fetched twice.
+        if self.max_depth is not None and depth > self.max_depth:
+            return
+
         for i in urls:
-            self.work_queue.put_nowait(i)
+            i = self.canonical_url(i)
+            if not self._check_url(i):
+                continue
+
+            self.seen_url.add(i)
+            self.work_queue.put_nowait(i, depth, self.priority(i, depth, parent_response))
+
+    def canonical_url(self, url):
+        """
+            Return the canonical form of url, see `seen.url.canonicalize_url`.
+        """
+        return canonicalize_url(url, self.url_sort_query, self.url_drop_params)
 
     def _check_url(self, url):
         if url in self.seen_url:
@@ -126,12 +435,44 @@ class Spider(MutableMapping):
 
         return True
 
+    def create_extract_spec(self):
+        """
+            Return the parsers whose items can be extracted in the browser page,
+            and the spec of `Browser.fetch(extract=...)`.
+        """
+        parsers = []
+        items = []
+        text = self.archive_mode == 'record'
+        for parser in self.parsers:
+            selectors = parser.page_selectors()
+            if selectors is not None:
+                parsers.append(parser)
+                items.append(selectors)
+            elif parser.item is not None:
+                text = True
+
+            if parser.rules or not parser.defaultUrlRule:
+                text = True
+
+        return parsers, {'items': items, 'links': True, 'text': text}
+
     async def init_browser(self):
+        if self.archive_mode == 'replay':
+            self.state['browser'] = ArchiveBrowser(self.archive)
+            return
+
+        if self.browser_extract:
+            self.extract_parsers, self.extract_spec = self.create_extract_spec()
+
         if Browser is False:
             logger.error("please install pyppeteer correctly and try again.")
             exit("No pyppeteer.")
 
-        browser = Browser()
+        browser = Browser(self.browser_concurrency, self.browser_page_uses,
+                          block_resources=self.browser_block_resources,
+                          block_urls=self.browser_block_urls,
+                          block_third_party=self.browser_block_third_party,
+                          wait_until=self.browser_wait_until)
 
         logger.info("launch browser, please wait..")
         try:
@@ -163,31 +504,49 @@ class Spider(MutableMapping):
     async def _parse_content(self, response):
         # parse response's content.
         new_urls = []
+        routed = set(self.router.route(response.url))
         for parser in self.parsers:
-            urls = await parser(response)
+            if parser in routed:
+                urls = await parser(response)
+            else:
+                # the item is not wanted, the links (shared by the parsers) are still followed.
+                urls = parser.analyze_links(response)
             new_urls.extend(urls)
 
         return new_urls
 
     async def _fetch_url(self, url):
-        for i in range(self.max_tries):
-            response = await fetch_content(url, 
-                self.session, headers=self.headers, timeout=self.timeout, cookies=self.cookies)
-            # return None if failed.
-            if response is None:
-                logger.info(
-                    'Got None when requested this URL ({}), retring...'.format(url))
-                continue
+        # one try, return ErrorRequest if failed, False if skipped or not modified,
+        # the failed URL is retried by `work` through the work queue.
+        return await fetch_content(url, 
+            self.session, headers=self.headers, timeout=self.timeout, cookies=self.cookies,
+            max_body_size=self.max_body_size, content_types=self.content_types,
+            stream=self._stream_response if self.stream_parsers else None, cache=self.http_cache,
+            retry=self.retry_policy)
+
+    async def _stream_response(self, url, response):
+        # stream the body to the BinItem which wants it before the body is read,
+        # return False to read it as usual.
+        # the errors (such as 404 or 503) are read, so they are parsed or retried as usual.
+        if not 200 <= response.status < 300:
+            return False
 
-            return response
-        else:
-            await self.url_failed_handler(url)
-            return None
+        contentType = response.content_type
+        routed = self.router.route(url)
+        for parser in self.stream_parsers:
+            if parser in routed and parser.want_stream(contentType):
+                result = AioResult(url, None, response.headers, response.cookies, response.status)
+                await parser.stream_response(result, response.content.iter_chunked(parser.item.chunk_size))
+                return True
+
+        return False
 
     async def _fetch_url_by_browser(self, url, **kwargs):
         # return BrowserResponse
         # url text(HTML) cookies.
         browser = self.state.get('browser')
+        if self.extract_spec is not None:
+            kwargs['extract'] = self.extract_spec
         kwargs['max_tries'] = self.max_tries
         # ms
         kwargs['timeout'] = self.timeout * 1000
@@ -199,13 +558,68 @@ class Spider(MutableMapping):
             await self.url_failed_handler(url)
             return None
 
+        if response.extracted is not None:
+            # {parser: result}, the parsers find their results by themselves.
+            items = {}
+            for parser, result in zip(self.extract_parsers, response.extracted['items']):
+                for name in [i for i, value in result.items() if value is None]:
+                    logger.error('selector "{}:{}" was error in the page, please check again.'.format(
+                        name, parser.item.selector[name]))
+                    del result[name]
+                items[parser] = result
+
+            response.extracted = {'items': items, 'links': response.extracted['links']}
+
+        return response
+
+    def _browser_key(self, url):
+        if self.browser_remember == 'host':
+            return self.get_host(url)
+
+        path = urlsplit(url).path
+        return '{}{}'.format(self.get_host(url), path[:path.rfind('/') + 1] or '/')
+
+    def needs_browser(self, url, response):
+        """
+            Whether the page fetched by http should be fetched again by browser with use_browser = 'auto',
+            True if it misses one of `browser_markers` or the `required` fields of an item.
+            Can be overridden:
+
+            def needs_browser(self, url, response):
+                return '<noscript>' in response.text
+        """
+        contentType = (response.header or {}).get('Content-Type', '').split(';')[0].strip()
+        if contentType and not match_content_type(contentType, ('text/html', 'application/xhtml+xml')):
+            return False
+
+        if self.browser_markers and any(i not in response.text for i in self.browser_markers):
+            return True
+
+        # only the parsers which run on this URL.
+        return any(parser.needs_browser(response) for parser in self.router.route(url))
+
+    async def _fetch_url_hybrid(self, url):
+        # http first, the browser if needed.
+        if ((self.browser_urls_rule is not None and self.browser_urls_rule.search(url)) or
+                (self.browser_remember and self._browser_key(url) in self.browser_keys)):
+            return await self._fetch_url_by_browser(url)
+
+        response = await self._fetch_url(url)
+        if isinstance(response, AioResult) and self.needs_browser(url, response):
+            logger.info('URL {} needs the browser.'.format(url))
+            if self.browser_remember:
+                self.browser_keys.add(self._browser_key(url))
+            return await self._fetch_url_by_browser(url)
+
         return response
 
-    async def _parse_response(self, response):
+    async def _parse_response(self, response, depth=0):
         # parse response using _parse_content.
         if response:
+            # the URL may be redirected, it is kept in the canonical form as the queued ones.
+            self.seen_url.add(self.canonical_url(response.url))
             new_urls = await self._parse_content(response)
-            self._add_url_to_workqueue(new_urls)
+            self._add_url_to_workqueue(new_urls, depth + 1, response)
             logger.info('URL {} checked over.'.format(response.url))
             return True
 
@@ -213,59 +627,117 @@ class Spider(MutableMapping):
 
     async def work(self):
         # 1. Get URL from work_queue
-        # 2. Check whether the URL is corresponded.
-        # 3. Fetch content of this URL and parse it.
-        # 4. Add this URL to `seen` list.
-        # 5. Sleep `interval` seconds.
-        # 6. Again or Done.
+        #    URLs have been checked and added to `seen` list when they were queued.
+        # 2. Fetch content of this URL and parse it.
+        # 3. Again or Done.
+        # the work queue only hands out URLs whose host is ready, the highest priority first,
+        # see `create_work_queue`.
         try:
             while True:
-                url = await self.work_queue.get()
+                queued = await self.work_queue.get()
+                url = queued.url
                 logger.info('Getting URL: {}'.format(url))
 
-                # Check whether the URL is corresponded.
-                if not self._check_url(url):
-                    self.work_queue.task_done()
-                    continue
-
                 # use browser or not.
-                if self.use_browser:
+                if self.use_browser == 'auto':
+                    _fetch = self._fetch_url_hybrid
+                elif self.use_browser:
                     _fetch = self._fetch_url_by_browser
                 else:
                     _fetch = self._fetch_url
 
-                parse_result = await self._parse_response(await _fetch(url))
+                start = time.monotonic()
+                response = await _fetch(url)
+                if self.controller is not None:
+                    self.controller.record(self.get_host(url), time.monotonic() - start, response)
+
+                if isinstance(response, ErrorRequest):
+                    tries = queued.tries + 1
+                    if self.retry_policy.should_retry(response, tries):
+                        delay = self.retry_policy.delay(response, tries)
+                        logger.info('Retry URL {} in {:.1f} seconds ({}).'.format(url, delay, response.error_type))
+                        self.work_queue.retry(url, delay)
+                        continue
+
+                    await self.url_failed_handler(url)
+                    response = None
+
+                if response and self.archive_mode == 'record':
+                    self.archive.record(url, response)
+
+                if response is False:
+                    # skipped by max_body_size or content_types, streamed or not modified.
+                    self.work_queue.task_done(url)
+                    continue
+
+                parse_result = await self._parse_response(response, queued.depth)
 
                 if not parse_result:
                     # this url cannot be open.
                     self.error_urls.add(url)
-                    self.work_queue.task_done()
+                    self.work_queue.task_done(url)
                     continue
 
                 # all done.
-                self.seen_url.add(url)
-                self.work_queue.task_done()
-                await asyncio.sleep(self.interval)
+                self.work_queue.task_done(url)
 
         except asyncio.CancelledError:
             pass
 
-    async def crawl(self):
+    async def crawl(self, resume=False):
         logger.info('Start spider.')
         logger.info('Execute initialization.')
+        # continue the last crawl or start from roots.
+        if not self.init_frontier(resume):
+            roots = [self.roots] if isinstance(self.roots, str) else self.roots
+            for root in roots:
+                logger.info('get root url: {}'.format(root))
+            self._add_url_to_workqueue(roots)
+
+        if self.archive_mode == 'replay':
+            # no network, the responses are served from the archive.
+            self.archive = ResponseArchive(self.archive_path)
+            self.session = ArchiveSession(self.archive)
+        else:
+            # a session with its own connection pool,
+            # the responses are not kept by it, so the memory does not grow with the crawl.
+            self.session = new_session(limit=self.limit,
+                                       limit_per_host=self.limit_per_host,
+                                       keepalive_timeout=self.keepalive_timeout,
+                                       dns_cache_ttl=self.dns_cache_ttl,
+                                       retain=False)
+            if self.archive_mode == 'record':
+                self.archive = ResponseArchive(self.archive_path, 'w')
+
+        if self.http_cache_path is not None:
+            self.http_cache = HttpCache(self.http_cache_path, self.http_cache_replay)
+
         try:
             await self.init_spider()
         except TypeError:
             logger.error(
                 "Got some error information it seems because 'init_spider' is not an async function.", exc_info=True)
 
+        if isinstance(self.parse_executor, Executor):
+            self.parse_pool = self.parse_executor
+        elif self.parse_executor:
+            self.parse_pool = ProcessPoolExecutor(self.parse_workers)
+
+        self.pipeline = ItemPipeline(self.item_queue_size, self.save_concurrency, self.save_in_thread)
+        self.pipeline.start()
+
         logger.info('Initialization finished.')
 
         logger.info("Start work.")
         workers = [asyncio.Task(self.work()) for _ in range(self.concurrency)]
+        if self.frontier is not None:
+            workers.append(asyncio.Task(self._checkpoint_periodically()))
+        if self.sinks:
+            workers.append(asyncio.Task(self._flush_sinks_periodically()))
         asyncio.gather(*workers)
 
         await self.work_queue.join()
+        await self.pipeline.join()
 
         for i in workers:
             i.cancel()
@@ -274,23 +746,56 @@ class Spider(MutableMapping):
 
         logger.info("Gathering information...")
         logger.info("Error urls: {}".format(len(self.error_urls)))
+        logger.info("Stats: {}".format(self.stats()))
         logger.info("Spider finished.")
 
     async def close(self):
 
-        self.session.close()
+        # save the items left.
+        if self.pipeline is not None:
+            await self.pipeline.close()
+            self.pipeline = None
+
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception:
+                logger.error('failed to write the records of {}.'.format(sink), exc_info=True)
+
+        if self.http_cache is not None:
+            self.http_cache.close()
+            self.http_cache = None
+
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+
+        await self.session.aclose()
+        if self.parse_pool is not None and self.parse_pool is not self.parse_executor:
+            self.parse_pool.shutdown()
+        self.parse_pool = None
         if self.use_browser:
             await self.state.get('browser').close() 
 
-    def start(self):
+        if self.frontier is not None:
+            self.checkpoint()
+            self.frontier.close()
+            self.frontier = None
+
+    def start(self, resume=False):
+        """
+            :param resume: continue the last crawl saved in `frontier_path`, instead of starting from roots.
+        """
+        event_loop = asyncio.get_event_loop()
         try:
-            event_loop = asyncio.get_event_loop()
-            event_loop.run_until_complete(self.crawl())
+            event_loop.run_until_complete(self.crawl(resume))
         except KeyboardInterrupt:
-            event_loop.run_until_complete(self.close())
-
-            for task in asyncio.Task.all_tasks():
+            # stop the workers first, the URLs in flight are kept as pending by the checkpoint.
+            tasks = asyncio.Task.all_tasks(event_loop)
+            for task in tasks:
                 task.cancel()
-                event_loop.run_forever()
+            event_loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+
+            event_loop.run_until_complete(self.close())
         finally:
             event_loop.close()
@@ -0,0 +1,106 @@
+"""
+Join the links of a page to full URLs, and normalize URLs canonically,
+so the same page is not queued under different spellings.
+
+The base of a page (its URL, or `<base href>` if it has one) is parsed once, then
+most links (absolute, '//host/path' and '/path') are joined by concatenation, the others by urljoin.
+The links of other schemes (javascript:, mailto:...) are dropped, the fragments are stripped.
+
+Usage::
+    joiner = UrlJoiner('https://github.com/HuberTRoy/seen', find_base(html))
+    joiner.join('../seen?tab=1#readme')
+    >>> 'https://github.com/seen?tab=1'
+
+    canonicalize_url('HTTPS://GitHub.com:443/seen?b=2&a=1#readme', sort_query=True)
+    >>> 'https://github.com/seen?a=1&b=2'
+"""
+import re
+
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+
+_scheme = re.compile(r'([a-zA-Z][a-zA-Z0-9+.-]*):')
+_baseHref = re.compile(r'''<base\s[^>]*?href\s*=\s*["']?([^"'\s>]+)''', re.I)
+_defaultPorts = {'http': ':80', 'https': ':443'}
+
+
+def find_base(html, doc=None):
+    """
+        Return the href of `<base>` of a page, None if it has no one.
+
+        :param doc: the parsed document of html, if given, it is read instead of scanning html.
+    """
+    if doc is not None:
+        return doc('base').attr('href') or None
+
+    # <base> is in <head>.
+    end = html.find('</head>')
+    found = _baseHref.search(html, 0, end if end != -1 else len(html))
+    return found.group(1) if found else None
+
+
+class UrlJoiner(object):
+    """
+        :param url: the URL of the page.
+        :param base: the href of `<base>`, None if the page has no one.
+    """
+
+    def __init__(self, url, base=None):
+        if base:
+            url = urljoin(url, base.strip())
+
+        parts = urlsplit(url)
+        self.url = url
+        self.scheme = parts.scheme or 'http'
+        self.origin = '{}://{}'.format(self.scheme, parts.netloc) if parts.netloc else None
+
+    def __repr__(self):
+        return '<UrlJoiner: {}>'.format(self.url)
+
+    def join(self, link):
+        """
+            Return the full URL of link without the fragment, None if it is not an http(s) link.
+        """
+        link = link.strip()
+        if link.startswith(('http://', 'https://')):
+            url = link
+        elif link.startswith('//'):
+            url = '{}:{}'.format(self.scheme, link)
+        elif link.startswith('/') and self.origin is not None:
+            url = self.origin + link
+        else:
+            scheme = _scheme.match(link)
+            if scheme is not None and scheme.group(1).lower() not in _defaultPorts:
+                return None
+            url = urljoin(self.url, link)
+
+        fragment = url.find('#')
+        return url if fragment == -1 else url[:fragment]
+
+
+def canonicalize_url(url, sort_query=False, drop_params=None):
+    """
+        Strip the fragment, lowercase the scheme and host, remove the default port.
+
+        :param sort_query: sort the query parameters.
+        :param drop_params: the names of the query parameters to remove, such as {'utm_source', 'sessionid'}.
+    """
+    scheme, netloc, path, query, fragment = urlsplit(url)
+    scheme = scheme.lower()
+
+    userinfo, at, host = netloc.rpartition('@')
+    host = host.lower()
+    port = _defaultPorts.get(scheme)
+    if port is not None and host.endswith(port):
+        host = host[:-len(port)]
+
+    if query and (sort_query or drop_params):
+        # the raw pairs are kept as they are, decoding and encoding them again may change the request.
+        pairs = [i for i in query.split('&') if i]
+        if drop_params:
+            pairs = [i for i in pairs if i.partition('=')[0] not in drop_params]
+        if sort_query:
+            pairs.sort(key=lambda i: i.partition('=')[::2])
+        query = '&'.join(pairs)
+
+    return urlunsplit((scheme, userinfo + at + host, path, query, ''))
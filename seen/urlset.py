@@ -0,0 +1,195 @@
+"""
+Memory bounded sets of URLs, used as the `seen` list of spider.
+
+A Python set of URL strings takes hundreds of bytes per URL,
+FingerprintSet keeps 8 bytes fingerprints in an array (exact, 12~23 bytes per URL),
+ScalableBloomFilter keeps bits only (a few bytes per URL) with a small false positive rate.
+
+All of them have `add`, `in` and `len`, and can be pickled.
+
+Usage::
+    seen_url = create_url_set('bloom', error_rate=0.001)
+    seen_url.add('https://github.com')
+
+    'https://github.com' in seen_url
+    >>> True
+"""
+import math
+import hashlib
+
+from array import array
+
+
+def fingerprint(url):
+    """
+        Return the 64 bits fingerprint (never 0) of url.
+    """
+    digest = hashlib.md5(url.encode('utf-8', 'surrogatepass')).digest()
+    return int.from_bytes(digest[:8], 'little') or 1
+
+
+def _hashes(url):
+    digest = hashlib.md5(url.encode('utf-8', 'surrogatepass')).digest()
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+
+class FingerprintSet(object):
+    """
+        An exact set of URL fingerprints.
+
+        The fingerprints are stored in an open addressing hash table backed by array('Q'),
+        0 means an empty slot.
+
+        :param capacity: the number of URLs expected, it grows if more URLs are added.
+    """
+    load_factor = 0.7
+
+    def __init__(self, capacity=1024):
+        size = 8
+        while size * self.load_factor < capacity:
+            size *= 2
+
+        self._table = array('Q', bytes(8 * size))
+        self._mask = size - 1
+        self._len = 0
+
+    def __repr__(self):
+        return '<FingerprintSet: {} urls>'.format(self._len)
+
+    def __len__(self):
+        return self._len
+
+    def _find(self, fp):
+        # linear probing, return the slot of fp or the empty slot it should be put.
+        table = self._table
+        mask = self._mask
+        i = fp & mask
+        while True:
+            value = table[i]
+            if value == 0 or value == fp:
+                return i
+            i = (i + 1) & mask
+
+    def _resize(self):
+        old = self._table
+        self._table = array('Q', bytes(16 * len(old)))
+        self._mask = len(self._table) - 1
+        for fp in old:
+            if fp:
+                self._table[self._find(fp)] = fp
+
+    def add(self, url):
+        fp = fingerprint(url)
+        i = self._find(fp)
+        if self._table[i]:
+            return
+
+        self._table[i] = fp
+        self._len += 1
+        if self._len > len(self._table) * self.load_factor:
+            self._resize()
+
+    def __contains__(self, url):
+        return self._table[self._find(fingerprint(url))] != 0
+
+
+class BloomFilter(object):
+    """
+        A Bloom filter holds `capacity` URLs with `error_rate` false positive rate.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+
+        # bits and hash functions.
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _indexes(self, hashes):
+        h1, h2 = hashes
+        size = self.size
+        return ((h1 + i * h2) % size for i in range(self.hash_count))
+
+    def add_hashes(self, hashes):
+        bits = self.bits
+        for i in self._indexes(hashes):
+            bits[i >> 3] |= 1 << (i & 7)
+        self.count += 1
+
+    def contains_hashes(self, hashes):
+        bits = self.bits
+        return all(bits[i >> 3] & (1 << (i & 7)) for i in self._indexes(hashes))
+
+    def add(self, url):
+        self.add_hashes(_hashes(url))
+
+    def __contains__(self, url):
+        return self.contains_hashes(_hashes(url))
+
+    def __len__(self):
+        return self.count
+
+
+class ScalableBloomFilter(object):
+    """
+        A Bloom filter grows with the URLs, a new (larger and stricter) filter is added
+        when the last one is full, so the false positive rate is at most `error_rate`.
+
+        :param capacity: the capacity of the first filter.
+        :param error_rate: false positive rate.
+        :param growth: the capacity of each new filter is `growth` times the last one.
+        :param ratio: the error rate of each new filter is `ratio` times the last one.
+    """
+
+    def __init__(self, capacity=100000, error_rate=0.001, growth=2, ratio=0.5):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.ratio = ratio
+        self.filters = []
+        self._len = 0
+
+    def __repr__(self):
+        return '<ScalableBloomFilter: {} urls, {} filters>'.format(self._len, len(self.filters))
+
+    def __len__(self):
+        return self._len
+
+    def _contains(self, hashes):
+        return any(i.contains_hashes(hashes) for i in reversed(self.filters))
+
+    def add(self, url):
+        hashes = _hashes(url)
+        if self._contains(hashes):
+            return
+
+        if not self.filters or self.filters[-1].count >= self.filters[-1].capacity:
+            n = len(self.filters)
+            # the sum of all the error rates is error_rate.
+            self.filters.append(BloomFilter(self.capacity * self.growth ** n,
+                                            self.error_rate * (1 - self.ratio) * self.ratio ** n))
+
+        self.filters[-1].add_hashes(hashes)
+        self._len += 1
+
+    def __contains__(self, url):
+        return self._contains(_hashes(url))
+
+
+def create_url_set(backend='set', capacity=100000, error_rate=0.001):
+    """
+        :param backend: 'set': a Python set of URLs.
+                        'fingerprint': FingerprintSet, exact, stores 8 bytes fingerprints.
+                        'bloom': ScalableBloomFilter, with `error_rate` false positive rate.
+    """
+    if backend == 'set':
+        return set()
+    elif backend == 'fingerprint':
+        return FingerprintSet(capacity)
+    elif backend == 'bloom':
+        return ScalableBloomFilter(capacity, error_rate)
+
+    raise(TypeError('Unknow URL set backend: {}.'.format(backend)))
@@ -0,0 +1,35 @@
+import asyncio
+
+from seen.archive import ArchiveBrowser, ArchiveSession, ResponseArchive
+from seen.asrequests import AioResult, ErrorRequest
+from seen.browser_response import BrowserResponse
+from seen.fetch import fetch_content
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+def test_archive(tmpdir):
+    path = str(tmpdir.join('crawl.archive'))
+    archive = ResponseArchive(path, 'w')
+    archive.record('http://test.com', AioResult('http://test.com/', b'<title>1</title>',
+                                                {'Content-Type': 'text/html'}, None, 200))
+    archive.record('http://test.com/js', BrowserResponse('http://test.com/js', '<title>js</title>', []))
+    archive.close()
+
+    # an incomplete record at the end.
+    with open(path, 'ab') as f:
+        f.write(b'\x00\x00\x00\x10')
+
+    archive = ResponseArchive(path)
+    assert len(archive) == 2
+
+    response = run(fetch_content('http://test.com', ArchiveSession(archive)))
+    assert response.url == 'http://test.com/'
+    assert response.code == 200
+    assert response.text == '<title>1</title>'
+    assert response.header['content-type'] == 'text/html'
+
+    assert run(ArchiveBrowser(archive).fetch('http://test.com/js')).text == '<title>js</title>'
+    assert isinstance(run(fetch_content('http://test.com/none', ArchiveSession(archive))), ErrorRequest)
@@ -0,0 +1,135 @@
+import asyncio
+
+from seen.asrequests import (AioResult, AsRequests, ErrorRequest, detect_encoding,
+                             BODY_TOO_LARGE, CONTENT_TYPE_NOT_ALLOWED, STREAMED)
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+def test_detect_encoding():
+    content = '<html><head><meta charset="gbk"></head><body>中文</body></html>'.encode('gbk')
+
+    assert detect_encoding(content, {'Content-Type': 'text/html; charset=UTF-8'}) == 'utf-8'
+    assert detect_encoding(content, {'Content-Type': 'text/html'}) == 'gbk'
+    assert detect_encoding('\ufeff中文'.encode('utf-8')) == 'utf-8-sig'
+    # the head of the body is ASCII.
+    assert detect_encoding(b'a' * 100000 + '中文'.encode('utf-8')) == 'utf-8'
+
+
+def test_text_cached():
+    result = AioResult('http://test.com', '{"a": "中文"}'.encode('utf-8'),
+                       {'Content-Type': 'application/json; charset=utf-8'}, None, 200)
+
+    assert result.text is result.text
+    assert result.json == {'a': '中文'}
+
+    result.encoding = 'latin-1'
+    assert result.text != '{"a": "中文"}'
+
+
+class Chunks(object):
+    # async iterator of the chunks, not an async generator for Python 3.5.
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.chunks:
+            raise StopAsyncIteration
+        return self.chunks.pop(0)
+
+
+class Response(object):
+    # a fake aiohttp response.
+
+    def __init__(self, body, contentType='text/html', contentLength=None):
+        self.headers = {'Content-Type': contentType}
+        self.status = 200
+        self.content_type = contentType
+        self.content_length = contentLength
+        self.body = body
+        self.content = self
+        self.released = False
+
+    def iter_chunked(self, n):
+        return Chunks([self.body[i:i + n] for i in range(0, len(self.body), n)])
+
+    async def read(self):
+        return self.body
+
+    def release(self):
+        self.released = True
+
+
+def test_read_body():
+    ar = AsRequests()
+    body = b'x' * 1000
+
+    assert run(ar._read('http://test.com', Response(body), max_body_size=1000, chunk_size=100)) == body
+
+    result = run(ar._read('http://test.com', Response(body), max_body_size=999, chunk_size=100))
+    assert isinstance(result, ErrorRequest) and result.code == BODY_TOO_LARGE
+
+    # checked by the Content-Length header.
+    result = run(ar._read('http://test.com', Response(b'', contentLength=1000), max_body_size=999))
+    assert result.code == BODY_TOO_LARGE
+
+    result = run(ar._read('http://test.com', Response(body, 'image/png'), content_types=('text/*',)))
+    assert result.code == CONTENT_TYPE_NOT_ALLOWED
+    assert run(ar._read('http://test.com', Response(body, 'text/plain'), content_types=('text/*',))) == body
+
+
+def test_stream_timeout():
+    response = Response(b'x' * 1000)
+
+    class Session(object):
+        # a fake aiohttp session.
+        closed = True
+
+        async def get(self, url, **kwargs):
+            response.kwargs = kwargs
+            return response
+
+    async def stream(url, response):
+        # longer than the timeout.
+        await asyncio.sleep(0.2)
+        return True
+
+    ar = AsRequests(session=Session())
+    result = run(ar.get('http://test.com', timeout=0.1, stream=stream))
+
+    # the streamed body is only limited between two reads.
+    assert result.code == STREAMED
+    assert response.kwargs['timeout'].sock_read == 0.1
+    assert response.released
+
+
+def test_as_completed():
+    running = [0, 0]
+
+    class TestRequests(AsRequests):
+        # no network.
+        async def request(self, method, url, **kwargs):
+            running[0] += 1
+            running[1] = max(running)
+            await asyncio.sleep(0.01)
+            running[0] -= 1
+            return AioResult(url, b'', {}, None, 200)
+
+    ar = TestRequests(retain=False)
+    urls = ['http://test.com/{}'.format(i) for i in range(10)]
+
+    got = [i.url for i in ar.as_completed(iter(urls), limit=3)]
+
+    assert sorted(got) == sorted(urls)
+    # at most 3 requests at the same time.
+    assert running[1] == 3
+    assert not ar.tasks and not ar.result
+
+    run(ar.get('http://test.com'))
+    assert not ar.tasks and not ar.result
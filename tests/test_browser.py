@@ -0,0 +1,104 @@
+import asyncio
+
+from seen.fetch_by_browser import Browser, PooledPage, get_site
+
+
+class Page(object):
+    # a fake pyppeteer page.
+
+    def __init__(self):
+        self.url = ''
+        self.closed = False
+
+    def on(self, event, handler):
+        pass
+
+    def isClosed(self):
+        return self.closed
+
+    async def goto(self, url, **kwargs):
+        await asyncio.sleep(0.01)
+        self.url = url
+
+    async def content(self):
+        return '<title>{}</title>'.format(self.url)
+
+    async def cookies(self):
+        return []
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser(object):
+
+    def __init__(self):
+        self.pages = []
+
+    async def newPage(self):
+        page = Page()
+        self.pages.append(page)
+        return page
+
+
+def test_browser_page_pool():
+    browser = Browser(concurrency=2, max_uses=2)
+    browser.browser = FakeBrowser()
+
+    async def main():
+        return await asyncio.gather(*[browser.fetch('http://test.com/{}'.format(i)) for i in range(5)])
+
+    responses = asyncio.get_event_loop().run_until_complete(main())
+
+    assert [i.text for i in responses] == ['<title>http://test.com/{}</title>'.format(i) for i in range(5)]
+    # 2 pages at the same time, each one is replaced after 2 uses.
+    assert len(browser.browser.pages) == 3
+    assert [i.closed for i in browser.browser.pages] == [True, True, False]
+    assert len(browser.idle) == 1
+
+
+class Request(object):
+    # a fake pyppeteer request.
+
+    def __init__(self, url, resourceType, frame=None):
+        self.url = url
+        self.resourceType = resourceType
+        self.frame = frame
+
+    def isNavigationRequest(self):
+        return self.resourceType == 'document'
+
+
+def test_browser_block():
+    browser = Browser(block_resources=('image', 'font'), block_urls=[r'/track\.js'], block_third_party=True)
+    pooled = PooledPage(Page())
+    pooled.page.mainFrame = 'main'
+    pooled.site = get_site('www.test.com')
+
+    assert not browser.should_block(pooled, Request('http://www.test.com/', 'document', 'main'))
+    assert not browser.should_block(pooled, Request('http://static.test.com/a.js', 'script'))
+    assert browser.should_block(pooled, Request('http://www.test.com/a.png', 'image'))
+    assert browser.should_block(pooled, Request('http://www.test.com/track.js', 'script'))
+    assert browser.should_block(pooled, Request('http://ads.other.com/a.js', 'script'))
+
+
+def test_browser_extract():
+    class ExtractPage(Page):
+        async def evaluate(self, script, spec):
+            return {'items': [{name: 'text' for name in i} for i in spec['items']], 'links': [self.url]}
+
+        async def content(self):
+            raise(AssertionError('the HTML is not wanted.'))
+
+    class ExtractBrowser(FakeBrowser):
+        async def newPage(self):
+            return ExtractPage()
+
+    browser = Browser()
+    browser.browser = ExtractBrowser()
+    spec = {'items': [{'title': ['title', None]}], 'links': True, 'text': False}
+
+    response = asyncio.get_event_loop().run_until_complete(browser.fetch('http://test.com', extract=spec))
+
+    assert response.text == ''
+    assert response.extracted == {'items': [{'title': 'text'}], 'links': ['http://test.com']}
@@ -0,0 +1,45 @@
+import asyncio
+
+from seen.asrequests import AioResult
+from seen.cache import HttpCache
+from seen.fetch import fetch_content
+
+
+class Session(object):
+    # a server returns 304 if the ETag matches.
+
+    def __init__(self):
+        self.requests = []
+
+    async def get(self, url, headers=None, **kwargs):
+        self.requests.append(headers)
+        if headers and headers.get('If-None-Match') == '"v1"':
+            return AioResult(url, b'', {}, None, 304)
+
+        return AioResult(url, b'<title>v1</title>', {'ETag': '"v1"', 'Content-Type': 'text/html'}, None, 200)
+
+
+def fetch(url, session, cache):
+    return asyncio.get_event_loop().run_until_complete(fetch_content(url, session, cache=cache, headers={'A': 'a'}))
+
+
+def test_cache_skip(tmpdir):
+    cache = HttpCache(str(tmpdir.join('cache.db')))
+    session = Session()
+
+    assert fetch('http://test.com', session, cache).code == 200
+    # not modified, nothing to parse.
+    assert fetch('http://test.com', session, cache) is False
+    assert session.requests[1] == {'A': 'a', 'If-None-Match': '"v1"'}
+
+
+def test_cache_replay(tmpdir):
+    cache = HttpCache(str(tmpdir.join('cache.db')), store_body=True)
+    session = Session()
+
+    fetch('http://test.com', session, cache)
+    response = fetch('http://test.com', session, cache)
+
+    assert response.code == 200
+    assert response.text == '<title>v1</title>'
+    assert response.header.get('content-type') == 'text/html'
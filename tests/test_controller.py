@@ -0,0 +1,64 @@
+import asyncio
+
+from seen.asrequests import AioResult, ErrorRequest
+from seen.controller import AIMDController
+from seen.scheduler import HostScheduler
+
+
+def ok():
+    return AioResult('http://a.com', b'', {}, None, 200)
+
+
+def test_controller_aimd():
+    controller = AIMDController(max_limit=8, cooldown=0, latency_factor=None)
+    assert controller.limit == 4
+
+    for _ in range(30):
+        controller.record('a.com', 0.1, ok())
+    assert controller.limit == 8
+
+    controller.record('a.com', 0.1, AioResult('http://a.com', b'', {}, None, 503))
+    assert controller.limit == 4
+    assert controller.host_limit('a.com') == 4
+
+    timeout = ErrorRequest(url='http://a.com', text='', content=b'', code='900', error_info='', error_type='timeout')
+    controller.record('a.com', 30, timeout)
+    assert controller.limit == 2
+    # b.com is not slowed down.
+    assert controller.host_limit('b.com') == 4
+    assert controller.stats() == {'limit': 2, 'host_limits': {'a.com': 2}}
+
+
+def test_controller_latency():
+    controller = AIMDController(max_limit=8, cooldown=10, latency_factor=3)
+    for _ in range(5):
+        controller.record('a.com', 0.1, ok())
+        controller.record('b.com', 2, ok())
+    limit = controller.limit
+    hostLimit = controller.host_limit('a.com')
+
+    for _ in range(20):
+        controller.record('a.com', 2, ok())
+    # cut once in the cooldown, only for the host.
+    assert controller.host_limit('a.com') == hostLimit // 2
+    # b.com is slow but steady, neither it nor a.com cuts the global limit.
+    assert controller.host_limit('b.com') > 4
+    assert controller.limit >= limit
+
+
+def test_scheduler_controller():
+    controller = AIMDController(max_limit=2, initial=1)
+    scheduler = HostScheduler(controller=controller)
+    for url in ('http://a.com/1', 'http://b.com/1'):
+        scheduler.put_nowait(url)
+
+    loop = asyncio.get_event_loop()
+    assert loop.run_until_complete(scheduler.get()).url == 'http://a.com/1'
+
+    # one URL in flight at most.
+    get = asyncio.ensure_future(scheduler.get())
+    loop.run_until_complete(asyncio.sleep(0.05))
+    assert not get.done()
+
+    scheduler.task_done('http://a.com/1')
+    assert loop.run_until_complete(asyncio.wait_for(get, 1)).url == 'http://b.com/1'
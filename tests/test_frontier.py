@@ -0,0 +1,62 @@
+import asyncio
+
+from seen.frontier import DiskFrontier
+from seen.scheduler import HostScheduler
+
+
+def test_frontier(tmpdir):
+    path = str(tmpdir.join('crawl.db'))
+    frontier = DiskFrontier(path)
+    frontier.spill([('http://test.com/1', 1, 0), ('http://test.com/2', 1, 0), ('http://test.com/3', 2, 1)])
+
+    assert frontier.count() == 3
+    # the higher priority URLs are loaded first.
+    assert frontier.load(2) == [('http://test.com/3', 2, 1), ('http://test.com/1', 1, 0)]
+    assert frontier.count() == 1
+
+    frontier.checkpoint([('http://test.com/1', 1, 0)], {'seen_url': {'http://test.com/1', 'http://test.com/3'}})
+    frontier.load(1)
+    frontier.close()
+
+    # the URL loaded after the checkpoint is not lost.
+    frontier = DiskFrontier(path)
+    assert frontier.has_checkpoint()
+
+    pending, state = frontier.restore()
+    assert pending == [('http://test.com/1', 1, 0, 0)]
+    assert state['seen_url'] == {'http://test.com/1', 'http://test.com/3'}
+    assert frontier.load(10) == [('http://test.com/2', 1, 0)]
+
+
+def test_scheduler_spill(tmpdir):
+    scheduler = HostScheduler(frontier=DiskFrontier(str(tmpdir.join('crawl.db'))), memory_limit=4)
+    urls = ['http://test.com/{}'.format(i) for i in range(10)]
+    for url in urls:
+        scheduler.put_nowait(url)
+
+    assert scheduler.qsize() == 10
+    assert len(scheduler.pending_urls()) == 4
+
+    got = []
+    for _ in urls:
+        url = asyncio.get_event_loop().run_until_complete(scheduler.get()).url
+        scheduler.task_done(url)
+        got.append(url)
+
+    assert got == urls
+    assert scheduler.empty()
+
+
+def test_scheduler_checkpoint_tries(tmpdir):
+    path = str(tmpdir.join('crawl.db'))
+    scheduler = HostScheduler(frontier=DiskFrontier(path))
+    scheduler.put_nowait('http://test.com/1')
+
+    queued = asyncio.get_event_loop().run_until_complete(scheduler.get())
+    scheduler.retry(queued.url, 60)
+    scheduler.checkpoint({})
+    scheduler.frontier.close()
+
+    # the URL waiting to retry keeps its tries.
+    pending, state = DiskFrontier(path).restore()
+    assert pending == [('http://test.com/1', 0, 0, 1)]
@@ -1,3 +1,5 @@
+import asyncio
+
 from seen import Item, BinItem, Css
 
 
@@ -88,4 +90,36 @@ def test_item_parser():
     assert 'content' in test_result.__dict__
 
     # test result
-    assert isinstance(test_result.content, bytes)
\ No newline at end of file
+    assert isinstance(test_result.content, bytes)
+
+
+def test_bin_item_stream(tmpdir):
+    path = str(tmpdir.join('test.bin'))
+
+    class TestStreamItem(BinItem):
+        stream = True
+
+        def file_path(self):
+            return path
+
+    class Chunks(object):
+        # async iterator of the chunks, not an async generator for Python 3.5.
+
+        def __init__(self):
+            self.left = 3
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            if not self.left:
+                raise StopAsyncIteration
+            self.left -= 1
+            return b'a binary data'
+
+    test_result = TestStreamItem(spider=None, response=TestBinary())
+    assert test_result.content is None
+
+    asyncio.get_event_loop().run_until_complete(test_result.save_stream(Chunks()))
+    with open(path, 'rb') as f:
+        assert f.read() == b'a binary data' * 3
@@ -0,0 +1,53 @@
+import re
+
+from seen.matcher import ContentMatcher, ContentRule
+
+
+class TestHtml:
+
+    text = '<title>abc</title><p id="12">price</p>'
+
+
+def test_matcher():
+    price = ContentRule('price')
+    abc = ContentRule('abc')
+    bc = ContentRule('bc')
+    pid = ContentRule(r'id="\d+"', regex=True)
+    title = ContentRule(r'<(title)>abc</\1>', regex=True)
+    missing = ContentRule('missing')
+    upper = ContentRule(re.compile('PRICE', re.I), regex=True)
+    matcher = ContentMatcher([price, abc, bc, pid, title, missing, upper])
+
+    # the overlapping rules are all found.
+    assert matcher.match(TestHtml.text) == {price, abc, bc, pid, title, upper}
+
+    response = TestHtml()
+    assert price(response) and not missing(response)
+    assert response._matched == (matcher, {price, abc, bc, pid, title, upper})
+
+    # the same as searching them one by one.
+    assert ContentRule('missing')(TestHtml()) is False
+    assert ContentRule(r'id="\d+"', regex=True)(TestHtml()) is True
+
+
+def test_matcher_alone():
+    # the same group names, a scoped and a global flag.
+    first = ContentRule(r'id="(?P<id>\d+)"', regex=True)
+    second = ContentRule(r'(?P<id>price)', regex=True)
+    scoped = ContentRule(r'(?i:PRICE)', regex=True)
+    flags = ContentRule(r'(?i)TITLE', regex=True)
+    matcher = ContentMatcher([first, second, scoped, flags])
+
+    assert matcher.match(TestHtml.text) == {first, second, scoped, flags}
+    assert matcher.match('nothing') == set()
+
+
+def test_matcher_frequent_rule():
+    frequent = ContentRule(r'<div>', regex=True)
+    rare = ContentRule(r'id="\d+"', regex=True)
+    missing = ContentRule(r'missing\d', regex=True)
+    matcher = ContentMatcher([frequent, rare, missing])
+
+    # the rules left after many matches are searched one by one.
+    assert matcher.match('<div>' * 1000 + 'id="1"') == {frequent, rare}
+    assert matcher.alternation is not None
@@ -1,4 +1,8 @@
+import asyncio
+
 from seen import Item, Parser, Css
+from seen.parser import find_urls, parse_page
+from seen.selector import get_document, parse_document
 
 
 class TestHtml:
@@ -35,3 +39,90 @@ def test_parser():
 
     assert sorted(new_urls) == sorted(
         ('http://test.com', 'https://test.com/test?id=1', 'https://test.com/testFolder/test?id=2'))
+
+    # test url with the parsed document
+    response = TestHtml()
+    parser_item = t_parser.parse_item(response)
+    new_urls = t_parser.get_urls(response.text, TestHtml.url, parser_item.doc)
+
+    assert parser_item.doc is get_document(response)
+    assert sorted(new_urls) == sorted(
+        ('http://test.com', 'https://test.com/test?id=1', 'https://test.com/testFolder/test?id=2'))
+
+
+def test_parse_page():
+    class TestItem(Item):
+        title = Css('title')
+        p = Css('p')
+
+    # the same result as the Item and the parser, but only with picklable arguments.
+    page = parse_page(TestItem.selector, False, None, TestHtml().text, TestHtml.url)
+
+    assert page['result'] == {'title': 'Test', 'p': 'P TEXT'}
+    assert sorted(page['urls']) == sorted(
+        ('http://test.com', 'https://test.com/test?id=1', 'https://test.com/testFolder/test?id=2'))
+
+    # URLs only.
+    page = parse_page(None, False, None, TestHtml().text, TestHtml.url)
+
+    assert page['result'] is None
+    assert len(page['urls']) == 3
+
+
+def test_parser_needs_browser():
+    class TestItem(Item):
+        title = Css('title')
+        price = Css('.price')
+        required = ('title',)
+
+    class PriceItem(Item):
+        price = Css('.price')
+        required = ('price',)
+
+    assert not Parser(item=TestItem).needs_browser(TestHtml())
+    assert Parser(item=PriceItem).needs_browser(TestHtml())
+    # the page is not wanted by the item.
+    assert not Parser(item=PriceItem, rule='no such text').needs_browser(TestHtml())
+
+
+def test_parser_extracted():
+    class TestItem(Item):
+        title = Css('title')
+        href = Css('a', 'href')
+
+    t_parser = Parser(item=TestItem)
+    assert t_parser.page_selectors() == {'title': ['title', None], 'href': ['a', 'href']}
+
+    # the results come from the browser page, the text is not parsed.
+    response = TestHtml()
+    response.extracted = {'items': {t_parser: {'title': 'Page'}}, 'links': ['https://test.com/a']}
+    items = []
+
+    async def save_item(item):
+        items.append(item)
+
+    t_parser.save_item = save_item
+    urls = asyncio.get_event_loop().run_until_complete(t_parser(response))
+
+    assert urls == ['https://test.com/a']
+    assert items[0].result == {'title': 'Page'}
+    assert get_document(response, parse=False) is None
+
+
+def test_parser_shared_links():
+    response = TestHtml()
+    first = asyncio.get_event_loop().run_until_complete(Parser()(response))
+    second = asyncio.get_event_loop().run_until_complete(Parser()(response))
+
+    # the links are found once for the response.
+    assert first is second
+    assert sorted(first) == sorted(
+        ('http://test.com', 'https://test.com/test?id=1', 'https://test.com/testFolder/test?id=2'))
+
+
+def test_find_urls_unescape():
+    html = '<a href="/x?a=1&amp;b=2">'
+
+    # the regex and the parsed document give the same URL.
+    assert set(find_urls(None, html, 'http://a.com/')) == {'http://a.com/x?a=1&b=2'}
+    assert set(find_urls(None, html, 'http://a.com/', parse_document(html))) == {'http://a.com/x?a=1&b=2'}
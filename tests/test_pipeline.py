@@ -0,0 +1,84 @@
+import time
+import asyncio
+import threading
+
+from seen.pipeline import ItemPipeline
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+class AsyncItem(object):
+    saved = []
+
+    def __init__(self, value):
+        self.value = value
+
+    async def save(self):
+        await asyncio.sleep(0.01)
+        self.saved.append(self.value)
+
+
+class SyncItem(AsyncItem):
+    threads = set()
+
+    def save(self):
+        time.sleep(0.01)
+        self.threads.add(threading.get_ident())
+        self.saved.append(self.value)
+
+
+def test_pipeline_backpressure():
+    AsyncItem.saved = []
+    pipeline = ItemPipeline(maxsize=2, concurrency=1)
+
+    async def main():
+        pipeline.start()
+        for i in range(5):
+            await pipeline.put(AsyncItem(i))
+            # the queue holds 2 items at most.
+            assert pipeline.queue.qsize() <= 2
+
+        await pipeline.join()
+        await pipeline.close()
+
+    run(main())
+    assert AsyncItem.saved == [0, 1, 2, 3, 4]
+
+
+def test_pipeline_save_in_thread():
+    SyncItem.saved = []
+    pipeline = ItemPipeline(maxsize=10, concurrency=2, save_in_thread=True)
+
+    async def main():
+        pipeline.start()
+        for i in range(4):
+            await pipeline.put(SyncItem(i))
+        await pipeline.join()
+
+    run(main())
+    assert sorted(SyncItem.saved) == [0, 1, 2, 3]
+    assert threading.get_ident() not in SyncItem.threads
+
+    # the items left are saved when it closes, even if the consumers have been cancelled.
+    for consumer in pipeline.consumers:
+        consumer.cancel()
+    pipeline.queue.put_nowait(SyncItem(4))
+    run(pipeline.close())
+    assert sorted(SyncItem.saved) == [0, 1, 2, 3, 4]
+
+
+def test_pipeline_close():
+    AsyncItem.saved = []
+    pipeline = ItemPipeline(maxsize=10, concurrency=2)
+
+    async def main():
+        pipeline.start()
+        for i in range(4):
+            await pipeline.put(AsyncItem(i))
+        # without join, the items being saved are finished.
+        await pipeline.close()
+
+    run(main())
+    assert sorted(AsyncItem.saved) == [0, 1, 2, 3]
@@ -0,0 +1,62 @@
+import time
+import socket
+import asyncio
+
+from seen.asrequests import ErrorRequest, classify_error
+from seen.retry import RetryPolicy, parse_retry_after
+from seen.scheduler import HostScheduler
+
+
+def error(error_type, headers=None):
+    return ErrorRequest(url='http://test.com', text='', content=b'', code='900', error_info='',
+                        error_type=error_type, headers=headers)
+
+
+def test_classify_error():
+    assert classify_error(asyncio.TimeoutError()) == 'timeout'
+    assert classify_error(socket.gaierror()) == 'dns'
+    assert classify_error(ConnectionResetError()) == 'connection'
+    assert classify_error(ValueError()) == 'error'
+
+
+def test_retry_policy():
+    policy = RetryPolicy(max_tries=4, base_delay=1, max_delay=3)
+
+    assert policy.should_retry(error('timeout'), 3)
+    assert not policy.should_retry(error('timeout'), 4)
+    # DNS failures are tried twice.
+    assert not policy.should_retry(error('dns'), 2)
+    assert not policy.should_retry(error('missing'), 1)
+    # an empty body or a programming error is not retried.
+    assert not policy.should_retry(error('empty'), 1)
+    assert not policy.should_retry(error('error'), 1)
+
+    assert 0 <= policy.delay(error('timeout'), 1) <= 1
+    assert all(policy.delay(error('timeout'), 10) <= 3 for _ in range(100))
+    assert policy.delay(error('status', {'Retry-After': '5'}), 1) == 5
+
+    assert parse_retry_after('120') == 120
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0
+    assert parse_retry_after('soon') is None
+
+
+def test_scheduler_retry():
+    scheduler = HostScheduler()
+    scheduler.put_nowait('http://a.com/1')
+    scheduler.put_nowait('http://b.com/1')
+    loop = asyncio.get_event_loop()
+
+    queued = loop.run_until_complete(scheduler.get())
+    start = time.monotonic()
+    scheduler.retry(queued.url, 0.1)
+
+    # the other URL is not held up.
+    assert loop.run_until_complete(scheduler.get()).url == 'http://b.com/1'
+    scheduler.task_done('http://b.com/1')
+
+    queued = loop.run_until_complete(asyncio.wait_for(scheduler.get(), 1))
+    assert queued.url == 'http://a.com/1' and queued.tries == 1
+    assert time.monotonic() - start >= 0.1
+
+    scheduler.task_done(queued.url)
+    loop.run_until_complete(asyncio.wait_for(scheduler.join(), 1))
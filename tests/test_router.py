@@ -0,0 +1,32 @@
+from seen import Parser
+from seen.router import ParserRouter
+
+
+def test_router():
+    post = Parser(urls=r'/t/\d+')
+    member = Parser(urls=[r'/member/', r'/u/'])
+    every = Parser()
+    router = ParserRouter([post, member, every])
+
+    assert router.route('https://test.com/t/1') == [post, every]
+    assert router.route('https://test.com/member/a') == [member, every]
+    assert router.route('https://test.com/u/t/1') == [post, member, every]
+    assert router.route('https://test.com/') == [every]
+
+    # no patterns, every parser runs.
+    assert ParserRouter([every]).route('https://test.com/') == [every]
+
+
+def test_router_alone():
+    # a global flag, the same group names and a back reference cannot be in one regex.
+    upper = Parser(urls=r'(?i)/T/')
+    first = Parser(urls=r'/t/(?P<id>\d+)')
+    second = Parser(urls=r'/u/(?P<id>\d+)')
+    twice = Parser(urls=r'/(a)/\1')
+    post = Parser(urls=r'/p/')
+    router = ParserRouter([upper, first, second, twice, post])
+
+    assert router.route('https://test.com/t/1') == [upper, first]
+    assert router.route('https://test.com/u/1') == [second]
+    assert router.route('https://test.com/a/a/p/') == [twice, post]
+    assert router.route('https://test.com/') == []
@@ -0,0 +1,69 @@
+import time
+import asyncio
+
+from seen.scheduler import HostScheduler
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+def test_scheduler_hosts_in_turn():
+    scheduler = HostScheduler()
+    for url in ('http://a.com/1', 'http://a.com/2', 'http://b.com/1', 'http://b.com/2'):
+        scheduler.put_nowait(url)
+
+    assert scheduler.qsize() == 4
+
+    urls = [run(scheduler.get()).url for _ in range(4)]
+
+    assert urls == ['http://a.com/1', 'http://b.com/1', 'http://a.com/2', 'http://b.com/2']
+    assert scheduler.empty()
+
+    for url in urls:
+        scheduler.task_done(url)
+
+    run(asyncio.wait_for(scheduler.join(), 1))
+
+
+def test_scheduler_rate():
+    # one fetch per 0.2 seconds per host.
+    scheduler = HostScheduler(rate=5)
+    for url in ('http://a.com/1', 'http://a.com/2', 'http://b.com/1'):
+        scheduler.put_nowait(url)
+
+    start = time.monotonic()
+    urls = [run(scheduler.get()).url for _ in range(3)]
+
+    # b.com does not wait for a.com.
+    assert urls == ['http://a.com/1', 'http://b.com/1', 'http://a.com/2']
+    assert 0.15 < time.monotonic() - start < 0.5
+
+
+def test_scheduler_host_concurrency():
+    scheduler = HostScheduler(host_concurrency=1)
+    for url in ('http://a.com/1', 'http://a.com/2', 'http://b.com/1'):
+        scheduler.put_nowait(url)
+
+    assert run(scheduler.get()).url == 'http://a.com/1'
+    assert run(scheduler.get()).url == 'http://b.com/1'
+
+    # a.com/2 waits for a.com/1.
+    async def done_later():
+        await asyncio.sleep(0.05)
+        scheduler.task_done('http://a.com/1')
+
+    asyncio.ensure_future(done_later())
+    assert run(asyncio.wait_for(scheduler.get(), 1)).url == 'http://a.com/2'
+
+
+def test_scheduler_priority():
+    scheduler = HostScheduler()
+    scheduler.put_nowait('http://a.com/1', depth=1, priority=0)
+    scheduler.put_nowait('http://a.com/2', depth=2, priority=5)
+    scheduler.put_nowait('http://b.com/1', depth=1, priority=1)
+
+    queued = [run(scheduler.get()) for _ in range(3)]
+
+    assert [i.url for i in queued] == ['http://a.com/2', 'http://b.com/1', 'http://a.com/1']
+    assert queued[0].depth == 2
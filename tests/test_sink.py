@@ -0,0 +1,78 @@
+import csv
+import json
+import sqlite3
+
+from seen.sink import JsonLinesSink, CsvSink, SqliteSink
+
+
+def test_jsonlines_sink(tmpdir):
+    path = str(tmpdir.join('items.jsonl'))
+    sink = JsonLinesSink(path, batch_size=2, flush_interval=None)
+    sink.write({'title': ['A']})
+    assert not tmpdir.join('items.jsonl').exists()
+
+    # a batch.
+    sink.write({'title': ['B']})
+    sink.write({'title': ['C']})
+    with open(path) as f:
+        assert [json.loads(i) for i in f] == [{'title': ['A']}, {'title': ['B']}]
+
+    sink.close()
+    with open(path) as f:
+        assert len(f.readlines()) == 3
+
+
+def test_sink_flush_interval(tmpdir):
+    path = str(tmpdir.join('items.jsonl'))
+    sink = JsonLinesSink(path, batch_size=100, flush_interval=0)
+    sink.write({'title': 'A'})
+    with open(path) as f:
+        assert f.read() == '{"title": "A"}\n'
+    sink.close()
+
+
+def test_csv_sink(tmpdir):
+    path = str(tmpdir.join('items.csv'))
+    sink = CsvSink(path)
+    sink.write({'title': 'A', 'tags': ['a', 'b']})
+    sink.write({'title': 'B', 'tags': []})
+    sink.close()
+
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert rows == [{'title': 'A', 'tags': '["a", "b"]'}, {'title': 'B', 'tags': '[]'}]
+
+
+def test_sqlite_sink(tmpdir):
+    path = str(tmpdir.join('items.db'))
+    sink = SqliteSink(path, table='pages', fields=['url', 'title'], batch_size=10)
+    for i in range(25):
+        sink.write({'url': 'http://test.com/{}'.format(i), 'title': ['T']})
+    sink.close()
+
+    db = sqlite3.connect(path)
+    assert db.execute('SELECT COUNT(*) FROM pages').fetchone()[0] == 25
+    assert db.execute('SELECT title FROM pages LIMIT 1').fetchone()[0] == '["T"]'
+
+
+def test_sink_failed_batch():
+    written = []
+
+    class FlakySink(JsonLinesSink):
+        def write_batch(self, records):
+            if not written:
+                written.append(None)
+                raise(IOError('disk full'))
+            written.extend(records)
+
+    sink = FlakySink('', batch_size=2, flush_interval=None)
+    sink.write({'title': 'A'})
+    try:
+        sink.write({'title': 'B'})
+    except IOError:
+        pass
+
+    # the failed batch is kept and written by the next flush.
+    assert sink.buffer == [{'title': 'A'}, {'title': 'B'}]
+    sink.close()
+    assert written[1:] == [{'title': 'A'}, {'title': 'B'}]
@@ -0,0 +1,259 @@
+import asyncio
+
+from seen import Spider, Parser, Item, BinItem, Css
+from seen.asrequests import AioResult
+from seen.browser_response import BrowserResponse
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+class Session(object):
+    # a fake session, pages: {url: html}, the others are 404.
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.fetched = []
+
+    async def get(self, url, **kwargs):
+        self.fetched.append(url)
+        html = self.pages.get(url)
+        if html is None:
+            return AioResult(url, b'not found', {'Content-Type': 'text/html'}, None, 404)
+
+        return AioResult(url, html.encode('utf-8'), {'Content-Type': 'text/html'}, None, 200)
+
+    async def aclose(self):
+        pass
+
+
+def crawl(spider, session, monkeypatch):
+    monkeypatch.setattr('seen.spider.new_session', lambda **kwargs: session)
+    run(spider.crawl())
+
+
+def test_spider_dedup(monkeypatch):
+    class TestSpider(Spider):
+        roots = 'http://a.com/'
+        concurrency = 3
+        parsers = [Parser()]
+
+    links = '<a href="/1"><a href="/2"><a href="http://a.com/1#top"><a href="/">'
+    session = Session({'http://a.com/': links, 'http://a.com/1': links, 'http://a.com/2': links})
+    crawl(TestSpider(), session, monkeypatch)
+
+    # every URL is queued (and fetched) once.
+    assert sorted(session.fetched) == ['http://a.com/', 'http://a.com/1', 'http://a.com/2']
+
+
+def test_spider_depth_priority(monkeypatch):
+    class TestSpider(Spider):
+        roots = 'http://a.com/'
+        concurrency = 1
+        max_depth = 1
+        parsers = [Parser()]
+
+        def priority(self, url, depth, parent_response):
+            return 10 if url.endswith('/b') else 0
+
+    session = Session({
+        'http://a.com/': '<a href="/a"><a href="/b">',
+        'http://a.com/a': '<a href="/a/deep">',
+        'http://a.com/b': '',
+    })
+    crawl(TestSpider(), session, monkeypatch)
+
+    # the higher priority first, the pages deeper than max_depth are not fetched.
+    assert session.fetched == ['http://a.com/', 'http://a.com/b', 'http://a.com/a']
+
+
+def test_spider_resume(monkeypatch, tmpdir):
+    class TestSpider(Spider):
+        roots = 'http://a.com/'
+        concurrency = 2
+        frontier_path = str(tmpdir.join('crawl.db'))
+        parsers = [Parser()]
+
+    class SlowSession(Session):
+        async def get(self, url, **kwargs):
+            if url.endswith('/slow'):
+                self.fetched.append(url)
+                # never answers, the crawl is stopped.
+                await asyncio.Event().wait()
+            return await super().get(url, **kwargs)
+
+    pages = {'http://a.com/': '<a href="/fast"><a href="/slow">', 'http://a.com/fast': '', 'http://a.com/slow': ''}
+    session = SlowSession(pages)
+    monkeypatch.setattr('seen.spider.new_session', lambda **kwargs: session)
+    spider = TestSpider()
+    loop = asyncio.get_event_loop()
+    loop.create_task(spider.crawl())
+    while 'http://a.com/slow' not in session.fetched or 'http://a.com/fast' not in session.fetched:
+        run(asyncio.sleep(0.01))
+    run(asyncio.sleep(0.05))
+
+    # stopped as `start` does on KeyboardInterrupt.
+    tasks = asyncio.Task.all_tasks(loop)
+    for task in tasks:
+        task.cancel()
+    run(asyncio.gather(*tasks, return_exceptions=True))
+    run(spider.close())
+
+    # only the URL in flight is fetched again.
+    session = Session(pages)
+    monkeypatch.setattr('seen.spider.new_session', lambda **kwargs: session)
+    run(TestSpider().crawl(resume=True))
+    assert session.fetched == ['http://a.com/slow']
+
+
+def test_spider_retry(monkeypatch):
+    saved = []
+
+    class Page(Item):
+        title = Css('title')
+
+        def save(self):
+            saved.append(self.result['title'])
+
+    class TestSpider(Spider):
+        roots = 'http://a.com/'
+        retry_base_delay = 0
+        parsers = [Parser(Page)]
+
+    class FlakySession(Session):
+        async def get(self, url, **kwargs):
+            if not self.fetched:
+                self.fetched.append(url)
+                return AioResult(url, b'busy', {'Content-Type': 'text/html'}, None, 503)
+            return await super().get(url, **kwargs)
+
+    session = FlakySession({'http://a.com/': '<title>root</title>'})
+    crawl(TestSpider(), session, monkeypatch)
+
+    # the 503 is retried through the work queue.
+    assert session.fetched == ['http://a.com/', 'http://a.com/']
+    assert saved == ['root']
+
+
+def test_spider_browser_auto(monkeypatch):
+    saved = []
+
+    class Price(Item):
+        price = Css('.price')
+        required = ('price',)
+
+        def save(self):
+            saved.append(self.response.url)
+
+    class Browser(object):
+        # a fake browser, the prices are rendered by JavaScript.
+
+        def __init__(self):
+            self.fetched = []
+
+        async def fetch(self, url, **kwargs):
+            self.fetched.append(url)
+            return BrowserResponse(url, '<p class="price">1</p><a href="/js/2">', [])
+
+        async def close(self):
+            pass
+
+    browser = Browser()
+
+    class TestSpider(Spider):
+        roots = 'http://a.com/'
+        use_browser = 'auto'
+        browser_remember = 'path'
+        parsers = [Parser(Price, urls=r'/js/')]
+
+        async def init_browser(self):
+            self.state['browser'] = browser
+
+    session = Session({'http://a.com/': '<a href="/js/1">', 'http://a.com/js/1': '<p>loading</p>'})
+    crawl(TestSpider(), session, monkeypatch)
+
+    # /js/1 misses the price, so /js/ is fetched by browser since then.
+    assert session.fetched == ['http://a.com/', 'http://a.com/js/1']
+    assert browser.fetched == ['http://a.com/js/1', 'http://a.com/js/2']
+    assert saved == ['http://a.com/js/1', 'http://a.com/js/2']
+
+
+def test_spider_follow_unrouted_links(monkeypatch):
+    saved = []
+
+    class Post(Item):
+        title = Css('title')
+
+        def save(self):
+            saved.append(self.result['title'])
+
+    class TestSpider(Spider):
+        roots = 'http://a.com/'
+        parsers = [Parser(Post, urls=r'/p\d')]
+
+    session = Session({
+        'http://a.com/': '<title>root</title><a href="/list">',
+        'http://a.com/list': '<title>list</title><a href="/p1"><a href="/p2">',
+        'http://a.com/p1': '<title>1</title>',
+        'http://a.com/p2': '<title>2</title>',
+    })
+    crawl(TestSpider(), session, monkeypatch)
+
+    # no parser is routed to the root and the list, their links are followed.
+    assert sorted(session.fetched) == sorted(session.pages)
+    assert sorted(saved) == ['1', '2']
+
+
+class Chunks(object):
+    # async iterator of the chunks.
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.chunks:
+            raise StopAsyncIteration
+        return self.chunks.pop(0)
+
+
+class StreamResponse(object):
+    # a fake aiohttp response before the body is read.
+
+    def __init__(self, status, contentType):
+        self.status = status
+        self.content_type = contentType
+        self.headers = {'Content-Type': contentType}
+        self.cookies = None
+        self.content = self
+
+    def iter_chunked(self, n):
+        return Chunks([b'data'])
+
+
+def test_spider_stream_response():
+    streamed = []
+
+    class Image(BinItem):
+        stream = True
+
+        async def save_stream(self, chunks):
+            async for chunk in chunks:
+                streamed.append((self.response.url, chunk))
+
+    class TestSpider(Spider):
+        parsers = [Parser(Image, urls=r'\.png$')]
+
+    spider = TestSpider()
+
+    # not routed to the parser, an error status, or a page.
+    assert not run(spider._stream_response('http://a.com/page', StreamResponse(200, 'image/png')))
+    assert not run(spider._stream_response('http://a.com/a.png', StreamResponse(503, 'image/png')))
+    assert not run(spider._stream_response('http://a.com/a.png', StreamResponse(200, 'text/html')))
+    assert not streamed
+
+    assert run(spider._stream_response('http://a.com/a.png', StreamResponse(200, 'image/png')))
+    assert streamed == [('http://a.com/a.png', b'data')]
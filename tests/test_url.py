@@ -0,0 +1,32 @@
+from seen.selector import parse_document
+from seen.url import UrlJoiner, canonicalize_url, find_base
+
+
+def test_url_joiner():
+    joiner = UrlJoiner('https://test.com/a/b.html')
+
+    assert joiner.join('http://test.com') == 'http://test.com'
+    assert joiner.join('//cdn.test.com/1.jpg') == 'https://cdn.test.com/1.jpg'
+    assert joiner.join('/c?id=1#top') == 'https://test.com/c?id=1'
+    assert joiner.join('c?id=2') == 'https://test.com/a/c?id=2'
+    assert joiner.join('../d') == 'https://test.com/d'
+    assert joiner.join('javascript:void(0)') is None
+    assert joiner.join('mailto:a@test.com') is None
+
+    # <base href>
+    html = '<head><base href="https://static.test.com/x/"></head><a href="y">'
+    assert find_base(html) == find_base(html, parse_document(html)) == 'https://static.test.com/x/'
+    assert find_base('<a href="y">') is None
+    assert UrlJoiner('https://test.com/a/b.html', find_base(html)).join('y') == 'https://static.test.com/x/y'
+
+
+def test_canonicalize_url():
+    assert canonicalize_url('http://test.com') == 'http://test.com'
+    assert canonicalize_url('HTTP://User@Test.COM:80/A?b=2&a=1#top') == 'http://User@test.com/A?b=2&a=1'
+    assert canonicalize_url('https://test.com:443/') == 'https://test.com/'
+    assert canonicalize_url('https://test.com:8443/') == 'https://test.com:8443/'
+    assert canonicalize_url('https://test.com/?b=2&utm_source=x&a=1&c=',
+                            sort_query=True, drop_params={'utm_source'}) == 'https://test.com/?a=1&b=2&c='
+    # the raw pairs are kept, not decoded and encoded again.
+    assert canonicalize_url('https://test.com/s?q=%C4%E3%BA%C3&flag&a=b%20c+d',
+                            sort_query=True) == 'https://test.com/s?a=b%20c+d&flag&q=%C4%E3%BA%C3'
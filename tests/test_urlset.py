@@ -0,0 +1,44 @@
+import pickle
+
+from seen.urlset import FingerprintSet, ScalableBloomFilter, create_url_set
+
+
+URLS = ['https://test.com/item?id={}'.format(i) for i in range(5000)]
+
+
+def test_fingerprint_set():
+    # grows from a small table.
+    url_set = FingerprintSet(16)
+    for url in URLS:
+        url_set.add(url)
+    url_set.add(URLS[0])
+
+    assert len(url_set) == len(URLS)
+    assert all(url in url_set for url in URLS)
+    assert not any('https://test.com/other?id={}'.format(i) in url_set for i in range(5000))
+
+    # can be pickled.
+    url_set = pickle.loads(pickle.dumps(url_set))
+    assert URLS[-1] in url_set
+
+
+def test_bloom_filter():
+    url_set = ScalableBloomFilter(capacity=1000, error_rate=0.01)
+    for url in URLS:
+        url_set.add(url)
+
+    # no false negative.
+    assert all(url in url_set for url in URLS)
+    assert len(url_set.filters) > 1
+
+    false_positives = sum('https://test.com/other?id={}'.format(i) in url_set for i in range(5000))
+    assert false_positives < 5000 * 0.01 * 2
+
+    # a few bytes per URL.
+    assert sum(len(i.bits) for i in url_set.filters) < len(URLS) * 4
+
+
+def test_create_url_set():
+    assert isinstance(create_url_set('set'), set)
+    assert isinstance(create_url_set('fingerprint'), FingerprintSet)
+    assert isinstance(create_url_set('bloom'), ScalableBloomFilter)